@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from codebook import ENCODING_MAPPING, decode_column
+from data_loader import DERIVED_CACHE_ENTRIES, dataset_key
+from filters import BitmapIndex
+from perf import instrument
+
+# ===========================
+# PRACTICE ADOPTION MATRIX
+# ===========================
+# The climate-smart practice columns are packed into one bit matrix: a row
+# per practice, a bit per household, set when the answer is past code 0.
+# Co-adoption and adoption by group are products of 0/1 matrices, evaluated
+# on the packed bytes as AND + popcount, so twenty practices over ten
+# million households take 25 MB and a product is a few hundred byte sweeps.
+PRACTICE_COLUMNS = [
+    'Use of biofertilizers',
+    'Use of biopesticides',
+    'Use of animal manure',
+    'Composting manure',
+    'Integrated pest management',
+    'Use of tolerant seeds',
+    'Green manure',
+    'Use of cover crops',
+    'Mulching',
+    'Terraces',
+    'Grass strips',
+    'Trashlines',
+    'Hedgerows',
+    'Minimum tillage',
+    'Contour farming',
+    'Contour bunds',
+    'Retention pits',
+    'Retention ditches',
+    'Water harvesting',
+    'Agroforestry',
+]
+
+# Demographic dimensions adoption can be broken down by
+GROUP_COLUMNS = [
+    'Gender of household head',
+    'Marital status',
+    'Level of education',
+    'If household has a land use plan',
+    'Perception of climate change',
+    'Membership to community organization/Group',
+    'Access to training',
+]
+
+# Households per block when sweeping the packed matrix (a multiple of 8)
+BLOCK_ROWS = 1 << 20
+
+
+def adopted(series):
+    """Households using a practice at any level, decoded column or not."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy() > 0
+    return series.to_numpy() > 0
+
+
+def packed_product(left, right=None):
+    """``L @ R.T`` for 0/1 matrices whose rows are packed bits.
+
+    Entry (i, j) counts the households set in both row i of ``left`` and
+    row j of ``right``; without ``right`` it is the symmetric ``L @ L.T``
+    and only the upper triangle is swept. Columns are swept in blocks so
+    the temporaries stay cache-sized however many households there are.
+    """
+    symmetric = right is None
+    right = left if symmetric else right
+    product = np.zeros((len(left), len(right)), dtype=np.int64)
+    block_bytes = BLOCK_ROWS // 8
+    for start in range(0, left.shape[1], block_bytes):
+        right_block = right[:, start:start + block_bytes]
+        for i, row in enumerate(left[:, start:start + block_bytes]):
+            first = i if symmetric else 0
+            product[i, first:] += np.bitwise_count(right_block[first:] & row).sum(axis=1, dtype=np.int64)
+    if symmetric:
+        product = np.triu(product) + np.triu(product, 1).T
+    return product
+
+
+class AdoptionMatrix:
+    """Packed practice-by-household adoption bits of a frame, plus group bitmaps."""
+
+    def __init__(self, data, practices=PRACTICE_COLUMNS, groups=GROUP_COLUMNS):
+        self.practices = [column for column in practices if column in data.columns]
+        self.rows = len(data)
+        self.bits = np.empty((len(self.practices), (self.rows + 7) // 8), dtype=np.uint8)
+        for i, column in enumerate(self.practices):
+            self.bits[i] = np.packbits(adopted(data[column]))
+        self.groups = BitmapIndex(data, groups)
+
+    def co_adoption(self):
+        """Households adopting both practices of each pair; adopters on the diagonal."""
+        counts = packed_product(self.bits)
+        return pd.DataFrame(counts, index=self.practices, columns=self.practices)
+
+    def household_counts(self):
+        """Number of practices each household adopted."""
+        counts = np.empty(self.rows, dtype=np.uint8)
+        for start in range(0, self.rows, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self.rows)
+            block = np.unpackbits(self.bits[:, start // 8:(stop + 7) // 8], axis=1, count=stop - start)
+            counts[start:stop] = block.sum(axis=0, dtype=np.uint8)
+        return counts
+
+    def adoption_counts(self):
+        """(Practices adopted, Households) for 0 up to every practice."""
+        counts = np.bincount(self.household_counts(), minlength=len(self.practices) + 1)
+        return pd.DataFrame({'Practices adopted': np.arange(len(counts)), 'Households': counts})
+
+    def adoption_by(self, column):
+        """Households and adopters of every practice, per value of ``column``."""
+        bitmaps = self.groups.bitmaps(column)
+        group_bits = np.stack(list(bitmaps.values()))
+        table = pd.DataFrame(packed_product(group_bits, self.bits), columns=self.practices)
+        table.insert(0, 'Households', np.bitwise_count(group_bits).sum(axis=1, dtype=np.int64))
+        table.insert(0, column, list(bitmaps))
+        return table
+
+
+# ===========================
+# STREAMED ADOPTION TOTALS
+# ===========================
+class AdoptionTotals:
+    """The same tables summed over chunks of undecoded rows.
+
+    Every table is a count, so a chunk's matrix products (or another
+    summary's totals) are simply added; group values stay survey codes
+    until read.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._co_adoption = None
+        self._counts = None
+        self._groups = {}
+
+    def update(self, chunk):
+        matrix = AdoptionMatrix(chunk)
+        counts = matrix.adoption_counts().set_index('Practices adopted')['Households']
+        groups = {column: matrix.adoption_by(column).set_index(column) for column in matrix.groups.columns}
+        return self._add(matrix.rows, matrix.co_adoption(), counts, groups)
+
+    def merge(self, other):
+        return self._add(other.rows, other._co_adoption, other._counts, other._groups)
+
+    def _add(self, rows, co_adoption, counts, groups):
+        if co_adoption is None:
+            return self
+        self.rows += rows
+        if self._co_adoption is None:
+            self._co_adoption, self._counts = co_adoption, counts
+        else:
+            self._co_adoption = self._co_adoption.add(co_adoption, fill_value=0)
+            self._counts = self._counts.add(counts, fill_value=0)
+        for column, table in groups.items():
+            current = self._groups.get(column)
+            self._groups[column] = table if current is None else current.add(table, fill_value=0)
+        return self
+
+    def co_adoption(self):
+        return self._co_adoption.astype('int64')
+
+    def adoption_counts(self):
+        counts = self._counts.astype('int64')
+        return pd.DataFrame({'Practices adopted': counts.index.to_numpy(), 'Households': counts.to_numpy()})
+
+    def adoption_by(self, column):
+        if column not in self._groups:
+            raise KeyError(f"{column} was not accumulated while streaming; add it to GROUP_COLUMNS")
+        table = self._groups[column].sort_index().astype('int64').reset_index()
+        if column in ENCODING_MAPPING:
+            table[column] = decode_column(table[column], ENCODING_MAPPING[column])
+        return table
+
+
+# ===========================
+# CACHED ADOPTION TABLES
+# ===========================
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _adoption_matrix(_data, key):
+    return AdoptionMatrix(_data)
+
+
+def adoption_matrix(data):
+    """The shared adoption matrix of ``data``, packed once per dataset version."""
+    return _adoption_matrix(data, dataset_key(data))
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _co_adoption(_data, key):
+    return adoption_matrix(_data).co_adoption()
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _adoption_counts(_data, key):
+    return adoption_matrix(_data).adoption_counts()
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _adoption_by(_data, key, column):
+    return adoption_matrix(_data).adoption_by(column)
+
+
+@instrument('compute')
+def co_adoption(data):
+    """Practice x practice co-adoption counts of ``data``; adopters on the diagonal."""
+    if not isinstance(data, pd.DataFrame):
+        return data.co_adoption()
+    return _co_adoption(data, dataset_key(data))
+
+
+@instrument('compute')
+def adoption_counts(data):
+    """How many households adopted 0, 1, 2 ... of the practices."""
+    if not isinstance(data, pd.DataFrame):
+        return data.adoption_counts()
+    return _adoption_counts(data, dataset_key(data))
+
+
+@instrument('compute')
+def adoption_by(data, column):
+    """Households and adopters of every practice per value of ``column``."""
+    if not isinstance(data, pd.DataFrame):
+        return data.adoption_by(column)
+    return _adoption_by(data, dataset_key(data), column)
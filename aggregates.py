@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import DERIVED_CACHE_ENTRIES, dataset_key
+from perf import instrument
+
+# ===========================
+# PRECOMPUTED COUNT CUBES
+# ===========================
+# Every count-based chart is drawn from a small (dimensions -> Count) table
+# instead of handing the raw rows to Plotly, so the figure payload depends
+# on the number of categories rather than the number of households.
+CUBE_DIMENSIONS = [
+    ('Level of education',),
+    ('If household has a land use plan',),
+    ('Trend in soil condition',),
+    ('Household size', 'Gender of household head'),
+    ('Level of education', 'Water harvesting'),
+    ('Marital status', 'Perception of climate change'),
+    ('Membership to community organization/Group', 'Access to training'),
+]
+
+
+def compute_counts(data, dims):
+    """Count rows for every observed combination of ``dims``."""
+    counts = data.groupby(list(dims), observed=True, sort=True).size()
+    return counts[counts > 0].reset_index(name='Count')
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _build_cubes(_data, key):
+    return {
+        dims: compute_counts(_data, dims)
+        for dims in CUBE_DIMENSIONS
+        if all(col in _data.columns for col in dims)
+    }
+
+
+@instrument('compute')
+def count_cube(data, *dims):
+    """Count table for ``dims``, built once per dataset version.
+
+    Dimension tuples not listed in ``CUBE_DIMENSIONS`` are still answered,
+    just computed on the spot. ``data`` may also be a streamed
+    ``SurveySummary``, which answers from the counts it accumulated.
+    """
+    if not isinstance(data, pd.DataFrame):
+        return data.count_cube(*dims)
+    cubes = _build_cubes(data, dataset_key(data))
+    if dims in cubes:
+        return cubes[dims]
+    return compute_counts(data, dims)
+
+
+# ===========================
+# SERVER-SIDE DISTRIBUTIONS
+# ===========================
+# Histograms and box plots are summarised here so only bins, quartiles and
+# a bounded set of outliers ever reach the browser.
+MAX_HISTOGRAM_BINS = 100
+MAX_OUTLIERS_PER_GROUP = 200
+
+# (group, value) pairs drawn as box plots or density scatters. Streamed
+# summaries accumulate counts for these so they can be drawn out-of-core.
+DISTRIBUTION_PAIRS = [
+    ('Agroforestry', 'Land size'),
+    ('Water harvesting', 'Land size'),
+    ('Age', 'Land size'),
+]
+
+
+def histogram_bins(values, max_bins=MAX_HISTOGRAM_BINS, weights=None):
+    """Bin ``values`` into a (Start, End, Count) table.
+
+    Integer columns with a small range get one bin per value, which is what
+    Plotly would draw for survey answers such as Age. ``weights`` lets a
+    table of distinct values and their counts stand in for the raw column.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        keep = ~np.isnan(values)
+        values = values[keep]
+        weights = None if weights is None else np.asarray(weights)[keep]
+    if not len(values):
+        return pd.DataFrame({'Start': [], 'End': [], 'Count': []})
+
+    low, high = values.min(), values.max()
+    if values.dtype.kind in 'iu' and high - low < max_bins:
+        edges = np.arange(low, high + 2, dtype='float64') - 0.5
+    else:
+        edges = np.histogram_bin_edges(values, bins='auto')
+        if len(edges) - 1 > max_bins:
+            edges = np.linspace(low, high, max_bins + 1)
+    counts, edges = np.histogram(values, bins=edges, weights=weights)
+    return pd.DataFrame({'Start': edges[:-1], 'End': edges[1:], 'Count': counts})
+
+
+def _spread_sample(values, limit):
+    """Deterministic evenly spaced sample of a sorted array, keeping both ends."""
+    if len(values) <= limit:
+        return values
+    return values[np.linspace(0, len(values) - 1, limit).round().astype(int)]
+
+
+def compute_box_stats(data, value, by, max_outliers=MAX_OUTLIERS_PER_GROUP):
+    """Quartiles, 1.5×IQR whiskers and a bounded outlier sample per group.
+
+    Returns ``(stats, outliers)``; ``stats`` has one row per group of ``by``
+    and ``outliers`` at most ``max_outliers`` rows per group.
+    """
+    groups = data[by]
+    values = data[value].astype('float64')
+    grouped = values.groupby(groups, observed=True)
+
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['mean'] = grouped.mean()
+    stats['count'] = grouped.size()
+    iqr = stats['q3'] - stats['q1']
+    low_limit = (stats['q1'] - 1.5 * iqr).reindex(groups).to_numpy()
+    high_limit = (stats['q3'] + 1.5 * iqr).reindex(groups).to_numpy()
+
+    inside = (values.to_numpy() >= low_limit) & (values.to_numpy() <= high_limit)
+    inside_values = values[inside].groupby(groups[inside], observed=True)
+    stats['lowerfence'] = inside_values.min()
+    stats['upperfence'] = inside_values.max()
+
+    outside = values[~inside]
+    samples = [
+        pd.DataFrame({by: group, value: _spread_sample(np.sort(group_values.to_numpy()), max_outliers)})
+        for group, group_values in outside.groupby(groups[~inside], observed=True)
+    ]
+    outliers = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame({by: [], value: []})
+    return stats.reset_index(), outliers
+
+
+def box_stats_from_counts(counts, value, by, max_outliers=MAX_OUTLIERS_PER_GROUP):
+    """``compute_box_stats`` over a (by, value, Count) table instead of rows.
+
+    Quartiles use the same linear interpolation as Plotly and pandas, read
+    off the cumulative counts, so the result matches the raw computation.
+    Outliers are sampled from the distinct outlying values.
+    """
+    stats, samples = [], []
+    for group, part in counts.groupby(by, observed=True, sort=True):
+        part = part.sort_values(value)
+        values = part[value].to_numpy(dtype='float64')
+        weights = part['Count'].to_numpy()
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+
+        position = (total - 1) * np.array([0.25, 0.5, 0.75])
+        below = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        above = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        q1, median, q3 = below + (position - np.floor(position)) * (above - below)
+
+        iqr = q3 - q1
+        inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+        stats.append({
+            by: group, 'q1': q1, 'median': median, 'q3': q3,
+            'mean': (values * weights).sum() / total, 'count': total,
+            'lowerfence': values[inside].min(), 'upperfence': values[inside].max(),
+        })
+        if (~inside).any():
+            samples.append(pd.DataFrame({by: group, value: _spread_sample(values[~inside], max_outliers)}))
+
+    outliers = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame({by: [], value: []})
+    return pd.DataFrame(stats), outliers
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _histogram(_data, key, column):
+    return histogram_bins(_data[column].to_numpy())
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _box_stats(_data, key, value, by):
+    return compute_box_stats(_data, value, by)
+
+
+@instrument('compute')
+def binned_counts(data, column):
+    """Histogram table for ``column``, computed once per dataset version."""
+    if not isinstance(data, pd.DataFrame):
+        counts = data.count_cube(column)
+        return histogram_bins(counts[column].to_numpy(), weights=counts['Count'].to_numpy())
+    return _histogram(data, dataset_key(data), column)
+
+
+@instrument('compute')
+def box_stats(data, value, by):
+    """Box statistics of ``value`` grouped by ``by``, once per dataset version."""
+    if not isinstance(data, pd.DataFrame):
+        return box_stats_from_counts(data.count_cube(by, value), value, by)
+    return _box_stats(data, dataset_key(data), value, by)
+
+
+# ===========================
+# 2D DENSITY FOR LARGE SCATTERS
+# ===========================
+DENSITY_BINS = 60
+SPARSE_CELL_COUNT = 3
+MAX_DENSITY_OUTLIERS = 2_000
+
+
+def compute_density(data, x, y, bins=DENSITY_BINS, max_outliers=MAX_DENSITY_OUTLIERS, weights=None):
+    """2D histogram of ``x`` against ``y`` plus the points in sparse cells.
+
+    Returns ``(x_edges, y_edges, counts, outliers)``. Points that fall in a
+    cell holding at most ``SPARSE_CELL_COUNT`` rows are the ones a density
+    plot would hide, so an evenly spaced sample of them is kept to overlay.
+    With ``weights``, each row of ``data`` stands for that many households.
+    """
+    xs = data[x].to_numpy(dtype='float64')
+    ys = data[y].to_numpy(dtype='float64')
+    valid = ~(np.isnan(xs) | np.isnan(ys))
+    xs, ys = xs[valid], ys[valid]
+    if weights is not None:
+        weights = np.asarray(weights)[valid]
+
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins, weights=weights)
+    x_cell = np.clip(np.searchsorted(x_edges, xs, side='right') - 1, 0, len(x_edges) - 2)
+    y_cell = np.clip(np.searchsorted(y_edges, ys, side='right') - 1, 0, len(y_edges) - 2)
+    sparse = np.flatnonzero(counts[x_cell, y_cell] <= SPARSE_CELL_COUNT)
+    keep = _spread_sample(sparse, max_outliers)
+    outliers = pd.DataFrame({x: xs[keep], y: ys[keep]})
+    return x_edges, y_edges, counts, outliers
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _density(_data, key, x, y):
+    return compute_density(_data, x, y)
+
+
+@instrument('compute')
+def density_grid(data, x, y):
+    """Density grid of ``x`` against ``y``, computed once per dataset version."""
+    if not isinstance(data, pd.DataFrame):
+        counts = data.count_cube(x, y)
+        return compute_density(counts, x, y, weights=counts['Count'].to_numpy())
+    return _density(data, dataset_key(data), x, y)
@@ -0,0 +1,135 @@
+"""Serve the bundled images from the app itself, as resized WebP variants.
+
+    python assets.py        # pre-build every variant, e.g. in a container build
+
+Each JPEG shipped next to the pages is recompressed once into WebP at the
+display widths below and written to ``static/assets``, which Streamlit serves
+at ``app/static/assets`` (``server.enableStaticServing`` in
+.streamlit/config.toml). Pages emit a ``srcset`` so browsers fetch the
+smallest variant that fills the column. Variant names carry a hash of the
+source, so an edited image gets new URLs instead of a stale browser copy.
+"""
+import glob
+import hashlib
+import html
+import os
+import re
+import sys
+from collections import namedtuple
+
+import streamlit as st
+
+# ===========================
+# ASSET PIPELINE
+# ===========================
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_PATTERNS = ("*.jpg", "*.jpeg")
+VARIANT_DIR = os.path.join(ASSET_DIR, "static", "assets")
+VARIANT_URL = "app/static/assets"
+
+# Widths offered to the browser; sources are never upscaled
+DISPLAY_WIDTHS = (480, 768, 1024, 1440)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+ImageVariants = namedtuple('ImageVariants', ['width', 'height', 'webp', 'fallback'])
+
+
+def bundled_images():
+    """Every image shipped with the app, by file name."""
+    paths = (path for pattern in ASSET_PATTERNS for path in glob.glob(os.path.join(ASSET_DIR, pattern)))
+    return sorted(os.path.basename(path) for path in paths)
+
+
+def _slug(filename):
+    stem = os.path.splitext(filename)[0]
+    return re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-")
+
+
+def variant_widths(source_width):
+    return sorted({width for width in DISPLAY_WIDTHS if width < source_width} | {min(source_width, max(DISPLAY_WIDTHS))})
+
+
+def _write_variant(image, width, path, image_format, **options):
+    """Resize ``image`` to ``width`` and save it, unless an earlier run already did."""
+    if os.path.exists(path):
+        return
+    from PIL import Image
+
+    height = round(image.height * width / image.width)
+    resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    resized.save(tmp_path, image_format, **options)
+    os.replace(tmp_path, path)
+
+
+def build_variants(filename):
+    """Write the WebP variants and JPEG fallback of one bundled image."""
+    from PIL import Image, ImageOps
+
+    path = os.path.join(ASSET_DIR, filename)
+    with open(path, "rb") as fh:
+        digest = hashlib.sha256(fh.read()).hexdigest()[:12]
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    prefix = f"{_slug(filename)}.{digest}"
+    webp = []
+    for width in variant_widths(image.width):
+        name = f"{prefix}.{width}w.webp"
+        _write_variant(image, width, os.path.join(VARIANT_DIR, name), "WEBP", quality=WEBP_QUALITY, method=6)
+        webp.append((width, name))
+
+    # Largest size again as a progressive JPEG, for when static serving is off
+    width = webp[-1][0]
+    fallback = os.path.join(VARIANT_DIR, f"{prefix}.{width}w.jpg")
+    _write_variant(image, width, fallback, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return ImageVariants(width, round(image.height * width / image.width), webp, fallback)
+
+
+@st.cache_resource(show_spinner=False)
+def _image_variants(filename, version):
+    return build_variants(filename)
+
+
+def image_variants(filename):
+    """Variants of ``filename``, built on first use and again only when it changes."""
+    stat = os.stat(os.path.join(ASSET_DIR, filename))
+    return _image_variants(filename, (stat.st_mtime_ns, stat.st_size))
+
+
+# ===========================
+# RENDERING
+# ===========================
+def bundled_image(filename, alt):
+    """Show a bundled image at the column width from its smallest fitting variant."""
+    variants = image_variants(filename)
+    if not st.get_option("server.enableStaticServing"):
+        # Already JPEG at the display width, so st.image sends it unchanged
+        st.image(variants.fallback)
+        return
+
+    srcset = ", ".join(f"{VARIANT_URL}/{name} {width}w" for width, name in variants.webp)
+    st.markdown(
+        f'<img src="{VARIANT_URL}/{variants.webp[-1][1]}" srcset="{srcset}" sizes="100vw" '
+        f'width="{variants.width}" height="{variants.height}" alt="{html.escape(alt)}" '
+        f'style="width: 100%; height: auto;">',
+        unsafe_allow_html=True
+    )
+
+
+def main():
+    for filename in bundled_images():
+        variants = build_variants(filename)
+        source_kb = os.path.getsize(os.path.join(ASSET_DIR, filename)) / 1024
+        sizes = ", ".join(
+            f"{width}w {os.path.getsize(os.path.join(VARIANT_DIR, name)) / 1024:,.0f} KB"
+            for width, name in variants.webp
+        )
+        print(f"{filename} ({source_kb:,.0f} KB): {sizes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
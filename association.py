@@ -0,0 +1,184 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from correlation import iter_chunks
+from data_loader import DERIVED_CACHE_ENTRIES, SOURCE_COLUMN, dataset_key
+from perf import instrument
+
+# ===========================
+# CATEGORICAL ASSOCIATION ENGINE
+# ===========================
+# Every column is reduced to at most ``MAX_LEVELS`` levels and one-hot
+# encoded; a single Gram product of that indicator matrix then holds the
+# contingency table of every pair of columns at once. Chi-square, Cramér's
+# V and p-values for all pairs are read off those counts together, and the
+# counts add up across row chunks, workers and streamed files.
+MAX_LEVELS = 5
+
+# Continuous columns are cut at fixed edges (not quantiles) so every chunk
+# bins alike; a value equal to an edge falls in the upper bin
+BINNED_COLUMNS = {
+    'Age': [35, 45, 55, 65],
+    'Household size': [3, 5, 7, 9],
+    'Land size': [0.5, 1, 2, 4],
+}
+
+# Rows one-hot encoded at a time; float32 counts stay exact below 2**24
+BLOCK_ROWS = 1 << 16
+
+Association = namedtuple('Association', ['cramers_v', 'chi2', 'dof', 'p_value', 'n'])
+
+
+def association_columns(columns):
+    """Columns the engine covers: every survey column, not the file tag."""
+    return [column for column in columns if column != SOURCE_COLUMN]
+
+
+def level_codes(data, columns, levels=MAX_LEVELS):
+    """(rows, columns) level of each answer, -1 where it is missing.
+
+    Survey codes past the last level share it; ``BINNED_COLUMNS`` are cut
+    at their edges first. Decoded columns use their original codes.
+    """
+    codes = np.empty((len(data), len(columns)), dtype=np.int8)
+    for i, column in enumerate(columns):
+        series = data[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy().astype('float64')
+            values[values < 0] = np.nan
+        else:
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+        if column in BINNED_COLUMNS:
+            values = np.where(np.isnan(values), np.nan, np.searchsorted(BINNED_COLUMNS[column], values, side='right'))
+        codes[:, i] = np.where(np.isnan(values) | (values < 0), -1, np.minimum(values, levels - 1))
+    return codes
+
+
+# ===========================
+# CHI-SQUARE DISTRIBUTION
+# ===========================
+def _upper_gamma_q(a, x):
+    """Regularised upper incomplete gamma Q(a, x): series below a + 1, continued fraction above."""
+    if x <= 0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        denominator = a
+        for _ in range(1000):
+            denominator += 1
+            term *= x / denominator
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+
+    # Modified Lentz evaluation of the continued fraction
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefactor) * h
+
+
+def chi2_sf(statistic, dof):
+    """P(X >= statistic) for a chi-square variable with ``dof`` degrees of freedom."""
+    return _upper_gamma_q(dof / 2, statistic / 2)
+
+
+# ===========================
+# CONTINGENCY COUNTS
+# ===========================
+class ContingencyAccumulator:
+    """Level co-occurrence counts of every pair of columns, mergeable like the moments."""
+
+    def __init__(self, columns, levels=MAX_LEVELS):
+        self.columns = list(columns)
+        self.levels = levels
+        width = len(self.columns) * levels
+        self.counts = np.zeros((width, width), dtype=np.int64)
+
+    def update(self, chunk):
+        """Add one chunk: a one-hot Gram product per block of rows."""
+        codes = level_codes(chunk, self.columns, self.levels)
+        width = self.counts.shape[1]
+        offsets = np.arange(len(self.columns), dtype=np.int64) * self.levels
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = codes[start:start + BLOCK_ROWS]
+            # Every row sets one slot per column; missing answers all land in
+            # a trailing slot that is dropped from the product
+            slots = np.where(block >= 0, offsets + block, width)
+            onehot = np.zeros((len(block), width + 1), dtype=np.float32)
+            onehot[np.arange(len(block))[:, None], slots] = 1
+            self.counts += (onehot.T @ onehot)[:width, :width].astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def association(self):
+        """Chi-square, degrees of freedom, p-value and Cramér's V for every pair."""
+        k, levels = len(self.columns), self.levels
+        # tables[i, j, a, b]: rows with level a in column i and level b in column j
+        tables = self.counts.reshape(k, levels, k, levels).transpose(0, 2, 1, 3).astype('float64')
+        n = tables.sum(axis=(2, 3))
+        row_totals = tables.sum(axis=3)
+        col_totals = tables.sum(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected = row_totals[..., :, None] * col_totals[..., None, :] / n[..., None, None]
+            chi2 = np.where(expected > 0, (tables - expected) ** 2 / expected, 0.0).sum(axis=(2, 3))
+
+        # Only levels observed in the pair's complete rows count towards its shape
+        observed_rows = (row_totals > 0).sum(axis=2)
+        observed_cols = (col_totals > 0).sum(axis=2)
+        dof = (observed_rows - 1) * (observed_cols - 1)
+        shortest = np.minimum(observed_rows, observed_cols) - 1
+        defined = (dof > 0) & (n > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cramers_v = np.where(defined, np.sqrt(chi2 / (n * shortest)), np.nan)
+        chi2 = np.where(defined, chi2, np.nan)
+        p_value = np.full(chi2.shape, np.nan)
+        for i, j in zip(*np.nonzero(defined)):
+            p_value[i, j] = chi2_sf(chi2[i, j], dof[i, j])
+
+        def frame(values):
+            return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+        return Association(frame(cramers_v), frame(chi2), frame(dof), frame(p_value), frame(n.astype('int64')))
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _association(_data, key):
+    accumulator = ContingencyAccumulator(association_columns(_data.columns))
+    for chunk in iter_chunks(_data):
+        accumulator.update(chunk)
+    return accumulator.association()
+
+
+@instrument('compute')
+def association_matrix(data):
+    """All-pairs categorical association of ``data``, computed once per dataset version.
+
+    Streamed summaries answer from the counts accumulated while reading.
+    """
+    if not isinstance(data, pd.DataFrame):
+        return data.association()
+    return _association(data, dataset_key(data))
@@ -0,0 +1,331 @@
+"""Headless benchmark of every dashboard page at growing survey sizes.
+
+Each page is run through Streamlit's AppTest against synthetic surveys
+resampled from the shipped CSV, with SURVEY_PERF=1 so the loader, the
+aggregate helpers and the figure cache report their timings per section.
+
+    python benchmark.py                          # 10k, 100k, 1M and 10M rows
+    python benchmark.py --sizes 10000 100000     # a subset
+    python benchmark.py --save-baseline          # store results as the baseline
+
+Each entry point's cold-start import time is measured first, in a fresh
+interpreter, since that is what a newly started container pays.
+
+Results are compared with the stored baseline and any metric that grew by
+more than the tolerance is flagged; the exit status is 1 when one did.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from data_loader import DATA_DIR, DATA_PATH, sidecar_path
+from perf import PAGE_SECTION, PERF_ENV, PERF_EVENTS_KEY
+
+# ===========================
+# BENCHMARK SETTINGS
+# ===========================
+BENCHMARK_DIR = os.path.join(DATA_DIR, ".benchmark")
+BASELINE_PATH = os.path.join(DATA_DIR, "benchmark_baseline.json")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+WRITE_BLOCK_ROWS = 1_000_000
+PAGE_TIMEOUT = 900
+
+# Timings are the best of this many runs, each starting from cold caches
+REPEAT = 3
+
+# Pages, with the session key of their lazy section tabs (None: no tabs)
+PAGES = {
+    "home.py": None,
+    "objective2.py": "objective2_section",
+    "objective3.py": "objective3_section",
+    "objective4.py": "objective4_section",
+}
+
+# Relative growth allowed before a metric is flagged, and a floor under which
+# timing differences are treated as noise
+TOLERANCE = 0.25
+NOISE_FLOOR_SECONDS = 0.010
+
+
+# ===========================
+# SYNTHETIC SURVEYS
+# ===========================
+def synthetic_survey(rows, seed=0):
+    """Path of a CSV with ``rows`` households resampled from the shipped survey."""
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    path = os.path.join(BENCHMARK_DIR, f"survey_{rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    # Keep the original header (mangled BOM included) so the loader sees a real file
+    source = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as fh:
+        for start in range(0, rows, WRITE_BLOCK_ROWS):
+            count = min(WRITE_BLOCK_ROWS, rows - start)
+            block = source.iloc[rng.integers(0, len(source), count)]
+            block.to_csv(fh, index=False, header=start == 0)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ===========================
+# HEADLESS PAGE RUNS
+# ===========================
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _option_choices(at):
+    """``{key: value}`` runs trying every other option of each keyed selectbox and radio.
+
+    One widget changes per run, the others held at their defaults.
+    """
+    widgets = [widget for widget in [*at.selectbox, *at.radio] if widget.key]
+    defaults = {widget.key: widget.value for widget in widgets}
+    return [
+        {**defaults, widget.key: option}
+        for widget in widgets
+        for option in widget.options
+        if option != widget.value
+    ]
+
+
+def run_page(page, tabs_key, all_options=False):
+    """Run ``page`` once, opening every lazy tab; return (seconds, events, errors).
+
+    With ``all_options`` each tab is also rerun for every option of its
+    selectboxes and radios, so the snapshot export sees every choice.
+    """
+    at = AppTest.from_file(os.path.join(DATA_DIR, page), default_timeout=PAGE_TIMEOUT)
+    events, errors, elapsed = [], [], 0.0
+    runs = [(None, None)]
+    while runs:
+        label, choice = runs.pop(0)
+        if label is not None:
+            at.session_state[tabs_key] = label
+        for key, value in (choice or {}).items():
+            at.session_state[key] = value
+        at.session_state[PERF_EVENTS_KEY] = []
+        start = time.perf_counter()
+        at.run()
+        elapsed += time.perf_counter() - start
+        events.extend(at.session_state[PERF_EVENTS_KEY])
+        errors.extend(str(e.value) for e in at.exception)
+        if choice is None and all_options:
+            runs.extend((label, option) for option in _option_choices(at))
+        if label is None and choice is None and tabs_key:
+            runs.extend((tab.label, None) for tab in at.tabs[1:])
+    return elapsed, events, errors
+
+
+def summarise_events(events):
+    """Per section: load, compute, render and figure-build seconds and payload bytes."""
+    sections = defaultdict(lambda: defaultdict(float))
+    for event in events:
+        stats = sections[event["section"]]
+        if event["stage"] in ("load", "compute", "figure", "render"):
+            stats[f"{event['stage']}_s"] += event["value"]
+        elif event["stage"] == "payload":
+            stats["payload_bytes"] += event["value"]
+    for name, stats in sections.items():
+        # Figure time is reported net of the aggregates computed inside it
+        if "figure_s" in stats:
+            stats["figure_s"] = max(stats["figure_s"] - stats.get("compute_s", 0.0), 0.0)
+    return {name: dict(stats) for name, stats in sections.items()}
+
+
+def benchmark_once(path):
+    """Cold then warm runs of every page, starting from empty caches and no sidecar."""
+    if os.path.exists(sidecar_path(path)):
+        os.remove(sidecar_path(path))
+    os.environ["SURVEY_DATA"] = path
+    clear_caches()
+
+    results = {}
+    for page, tabs_key in PAGES.items():
+        cold_s, events, errors = run_page(page, tabs_key)
+        warm_s, _, warm_errors = run_page(page, tabs_key)
+        sections = summarise_events(events)
+        sections.setdefault(PAGE_SECTION, {})
+        sections[PAGE_SECTION].update({"cold_s": cold_s, "warm_s": warm_s})
+        results[page] = {"sections": sections, "errors": errors + warm_errors}
+    return results
+
+
+def benchmark_size(rows, repeat=REPEAT):
+    """Benchmark a ``rows``-household survey, keeping each metric's best of ``repeat`` runs."""
+    path = synthetic_survey(rows)
+    best = benchmark_once(path)
+    for _ in range(repeat - 1):
+        run = benchmark_once(path)
+        for page, result in run.items():
+            best[page]["errors"].extend(result["errors"])
+            for name, stats in result["sections"].items():
+                kept = best[page]["sections"].setdefault(name, {})
+                for metric, value in stats.items():
+                    kept[metric] = min(kept.get(metric, value), value)
+    return best
+
+
+# ===========================
+# COLD-START IMPORTS
+# ===========================
+# Each entry point runs once in a fresh interpreter under ``-X importtime``.
+# A throwaway script runs first so Streamlit's own runtime imports are paid
+# before the marker; every module imported after it is charged to the page.
+STARTUP_ENTRIES = ["main.py", *PAGES]
+IMPORT_MARKER = "benchmark: page start"
+HEAVIEST_IMPORTS = 3
+
+_IMPORT_PROBE = """
+import sys
+from streamlit.testing.v1 import AppTest
+AppTest.from_string("import streamlit as st\\nst.write('warm-up')").run()
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+AppTest.from_file(sys.argv[1], default_timeout={timeout}).run()
+"""
+
+_IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def page_imports(page):
+    """Seconds of imports a fresh process spends running ``page``, and the heaviest ones."""
+    probe = _IMPORT_PROBE.format(marker=IMPORT_MARKER, timeout=PAGE_TIMEOUT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe, os.path.join(DATA_DIR, page)],
+        capture_output=True, text=True, cwd=DATA_DIR, timeout=PAGE_TIMEOUT,
+    )
+    if IMPORT_MARKER not in proc.stderr:
+        raise RuntimeError(f"import probe for {page} failed: {proc.stderr.strip()[-500:]}")
+
+    # Only top-level imports: their cumulative time already covers the nested ones
+    top_level = {}
+    for line in proc.stderr.split(IMPORT_MARKER, 1)[1].splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match and not match.group(2):
+            top_level[match.group(3)] = int(match.group(1)) / 1e6
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:HEAVIEST_IMPORTS]
+    return sum(top_level.values()), heaviest
+
+
+def benchmark_imports(repeat=REPEAT):
+    """Best-of-``repeat`` cold-start import time of every entry point."""
+    startup = {}
+    for entry in STARTUP_ENTRIES:
+        runs = [page_imports(entry) for _ in range(repeat)]
+        import_s, heaviest = min(runs, key=lambda run: run[0])
+        startup[entry] = {"import_s": import_s, "heaviest": heaviest}
+    return startup
+
+
+# ===========================
+# REPORTING AND BASELINE
+# ===========================
+def flatten(results, startup=None):
+    """``{"rows/page/section/metric": value}`` view used for baseline comparison."""
+    flat = {f"startup/{entry}/import_s": stats["import_s"] for entry, stats in (startup or {}).items()}
+    for rows, pages in results.items():
+        for page, result in pages.items():
+            for name, stats in result["sections"].items():
+                for metric, value in stats.items():
+                    flat[f"{rows}/{page}/{name}/{metric}"] = value
+    return flat
+
+
+def regressions(current, baseline, tolerance=TOLERANCE):
+    """Metrics that grew past ``tolerance`` relative to the baseline."""
+    flagged = []
+    for key, value in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        grew = value > base * (1 + tolerance)
+        if key.endswith("_s"):
+            grew = grew and value - base > NOISE_FLOOR_SECONDS
+        if grew:
+            flagged.append((key, base, value))
+    return flagged
+
+
+def format_value(metric, value):
+    if metric.endswith("_bytes"):
+        return f"{value / 1024:,.1f} KB"
+    return f"{value * 1000:,.1f} ms"
+
+
+def print_startup(startup):
+    print("\n=== Cold-start imports ===")
+    for entry, stats in startup.items():
+        heaviest = ", ".join(f"{name} {format_value('_s', seconds)}" for name, seconds in stats["heaviest"])
+        print(f"  {entry:<16} import_s {format_value('import_s', stats['import_s'])}  ({heaviest})")
+
+
+def print_report(results):
+    for rows, pages in results.items():
+        print(f"\n=== {int(rows):,} rows ===")
+        for page, result in pages.items():
+            print(f"  {page}")
+            for name, stats in sorted(result["sections"].items()):
+                cells = ", ".join(f"{metric} {format_value(metric, value)}" for metric, value in sorted(stats.items()))
+                print(f"    {name:<40} {cells}")
+            for error in result["errors"]:
+                print(f"    ERROR: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="survey sizes in rows")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per size; the best is kept")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative growth")
+    parser.add_argument("--output", help="also write the full results to this JSON file")
+    args = parser.parse_args(argv)
+
+    startup = benchmark_imports(args.repeat)
+    print_startup(startup)
+
+    os.environ[PERF_ENV] = "1"
+    results = {str(rows): benchmark_size(rows, args.repeat) for rows in args.sizes}
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"startup": startup, "sizes": results}, fh, indent=2)
+
+    current = flatten(results, startup)
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(current, fh, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline stored yet; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    flagged = regressions(current, baseline, args.tolerance)
+    for key, base, value in flagged:
+        metric = key.rsplit("/", 1)[-1]
+        print(f"REGRESSION {key}: {format_value(metric, base)} -> {format_value(metric, value)}")
+    failed = flagged or any(result["errors"] for pages in results.values() for result in pages.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
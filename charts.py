@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from aggregates import binned_counts, box_stats, density_grid
+from codebook import category_orders
+
+# ===========================
+# SUMMARY FIGURE BUILDERS
+# ===========================
+# plotly.express is imported where it is used: it is the slowest import of a
+# page, and figure cache hits or summary-mode charts never need it.
+# Up to this many rows, box plots keep drawing every observation. Larger
+# surveys switch to server-computed boxes with a bounded outlier sample.
+RAW_POINTS_LIMIT = 5_000
+
+# Scatter plots draw SVG markers up to WEBGL_POINTS_LIMIT, a WebGL trace up
+# to DENSITY_POINTS_LIMIT, and a server-side density grid beyond that.
+WEBGL_POINTS_LIMIT = 10_000
+DENSITY_POINTS_LIMIT = 200_000
+
+
+def histogram_figure(data, column, title, template):
+    """Histogram drawn from server-side bins instead of the raw column."""
+    bins = binned_counts(data, column)
+    fig = go.Figure(go.Bar(
+        x=(bins['Start'] + bins['End']) / 2,
+        y=bins['Count'],
+        customdata=bins[['Start', 'End']],
+        hovertemplate=f"{column}: %{{customdata[0]:g}}–%{{customdata[1]:g}}<br>count: %{{y}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, template=template, xaxis_title=column, yaxis_title='count')
+    return fig
+
+
+def box_figure(data, x, y, title, template):
+    """Box plot of ``y`` by ``x``; summary mode once the data is large."""
+    if isinstance(data, pd.DataFrame) and len(data) <= RAW_POINTS_LIMIT:
+        import plotly.express as px
+        return px.box(
+            data,
+            x=x,
+            y=y,
+            title=title,
+            template=template,
+            points='all',
+            category_orders=category_orders(data, x)
+        )
+
+    stats, outliers = box_stats(data, y, x)
+    fig = go.Figure(go.Box(
+        x=stats[x].astype(str),
+        q1=stats['q1'],
+        median=stats['median'],
+        q3=stats['q3'],
+        lowerfence=stats['lowerfence'],
+        upperfence=stats['upperfence'],
+        mean=stats['mean'],
+        boxpoints=False,
+        name=y
+    ))
+    fig.add_trace(go.Scatter(
+        x=outliers[x].astype(str),
+        y=outliers[y],
+        mode='markers',
+        marker=dict(size=4),
+        name='Outliers (sample)'
+    ))
+    fig.update_layout(title=title, template=template, xaxis_title=x, yaxis_title=y, showlegend=False)
+    return fig
+
+
+def scatter_figure(data, x, y, title, template):
+    """Scatter of ``y`` against ``x`` that stays responsive as rows grow."""
+    if isinstance(data, pd.DataFrame) and len(data) <= DENSITY_POINTS_LIMIT:
+        import plotly.express as px
+        return px.scatter(
+            data,
+            x=x,
+            y=y,
+            title=title,
+            template=template,
+            render_mode='svg' if len(data) <= WEBGL_POINTS_LIMIT else 'webgl'
+        )
+
+    x_edges, y_edges, counts, outliers = density_grid(data, x, y)
+    # Empty cells stay transparent so the outlier markers read clearly
+    z = np.where(counts.T > 0, counts.T, np.nan)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale='Viridis',
+        colorbar=dict(title='Households'),
+        hovertemplate=f"{x}: %{{x:.3g}}<br>{y}: %{{y:.3g}}<br>households: %{{z}}<extra></extra>"
+    ))
+    fig.add_trace(go.Scattergl(
+        x=outliers[x],
+        y=outliers[y],
+        mode='markers',
+        marker=dict(size=4, color='white'),
+        name='Sparse points (sample)'
+    ))
+    fig.update_layout(title=title, template=template, xaxis_title=x, yaxis_title=y, showlegend=False)
+    return fig
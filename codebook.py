@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# ===========================
+# SURVEY CODEBOOK
+# ===========================
+# Labels for every coded column the dashboard decodes, indexed by survey
+# code (position 0 is code 0). Codes past the end of a list are kept as
+# "Code <n>" so unexpected answers still show up instead of being dropped.
+ENCODING_MAPPING = {
+    'Gender of household head': ['Male', 'Female'],
+    'Marital status': ['Single', 'Married', 'Divorced', 'Widowed'],
+    'Level of education': ['No formal education', 'Primary school', 'Secondary school', 'College/University', 'Vocational'],
+    'If household has a land use plan': ['No Plan', 'Has Plan'],
+    'Perception of climate change': ['Low Perception', 'Medium Perception', 'High Perception'],
+    'Membership to community organization/Group': ['No Membership', 'Member'],
+    'Access to training': ['No Access', 'Has Access'],
+    'Trend in soil condition': ['Deteriorated', 'Not Changed', 'Improved'],
+    'Water harvesting': ['No Adoption', 'Adopted'],
+    'Agroforestry': ['None', 'Low', 'Medium', 'High'],
+}
+
+
+def decode_column(codes, labels):
+    """Turn a series of integer codes into a Categorical of labels.
+
+    The codes become the categorical codes directly, so no per-value Python
+    work happens and ``.cat.codes`` still returns the original survey codes.
+    Missing answers (NaN in a float column) and negative codes become NaN.
+    """
+    values = codes.to_numpy()
+    if values.dtype.kind == 'f':
+        values = np.where(np.isnan(values), -1, values).astype('int64')
+    top = int(values.max()) if len(values) else -1
+    categories = list(labels) + [f"Code {code}" for code in range(len(labels), top + 1)]
+    values = np.where(values < 0, -1, values)
+    return pd.Series(pd.Categorical.from_codes(values, categories), index=codes.index, name=codes.name)
+
+
+def decode_frame(data):
+    """Decode every registered column present in ``data`` in place."""
+    for col, labels in ENCODING_MAPPING.items():
+        if col in data.columns:
+            data[col] = decode_column(data[col], labels)
+    return data
+
+
+def observed_categories(series):
+    """Categories of a decoded column that actually occur, in code order."""
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    return list(series.cat.categories[counts > 0])
+
+
+def category_orders(data, *columns):
+    """``category_orders`` for Plotly Express so axes follow code order."""
+    return {col: observed_categories(data[col]) for col in columns}
+
+
+def code_frame(data, columns):
+    """Numeric view of ``columns`` with decoded columns mapped back to codes."""
+    frame = {}
+    for col in columns:
+        series = data[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.cat.codes.astype("float64").where(series.notna())
+        frame[col] = series
+    return pd.DataFrame(frame, index=data.index)
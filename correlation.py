@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from codebook import code_frame
+from data_loader import DERIVED_CACHE_ENTRIES, dataset_key
+from perf import instrument
+
+# ===========================
+# STREAMING CORRELATION ENGINE
+# ===========================
+# Rows are consumed in chunks and folded into per-pair running moments, so
+# the heatmap never needs the whole survey in memory and partial results
+# from different chunks (or workers) can be merged.
+CHUNK_ROWS = 250_000
+
+
+class CovarianceAccumulator:
+    """Pairwise-complete Pearson moments that can be updated and merged.
+
+    For every pair of columns (i, j) it keeps, over the rows where both are
+    present, the count ``n[i, j]``, the mean of column i ``mean[i, j]``, the
+    sum of squared deviations of column i ``m2[i, j]`` and the co-moment
+    ``comoment[i, j]``. Chunks are combined with the parallel Welford
+    (Chan et al.) update, so the result does not depend on chunking.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk containing ``columns`` into the moments."""
+        values = code_frame(chunk, self.columns).to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        if not present.any():
+            return self
+        # Shift by the chunk means first to keep the sums well conditioned
+        with np.errstate(invalid='ignore'):
+            shift = np.nanmean(values, axis=0)
+        shift = np.nan_to_num(shift)
+        centred = np.where(present, values - shift, 0.0)
+        mask = present.astype('float64')
+
+        n = mask.T @ mask
+        sums = centred.T @ mask
+        sums_sq = (centred ** 2).T @ mask
+        cross = centred.T @ centred
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, sums / n, 0.0)
+        other = self._empty_like()
+        other.n = n
+        other.mean = mean + shift[:, None]
+        other.m2 = sums_sq - mean * sums
+        other.comoment = cross - mean * sums.T
+        return self.merge(other)
+
+    def merge(self, other):
+        """Combine the moments of ``other`` into this accumulator."""
+        n = self.n + other.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(n > 0, self.n * other.n / n, 0.0)
+            delta = other.mean - self.mean
+            self.mean = np.where(n > 0, self.mean + delta * other.n / n, 0.0)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * weight
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.n = n
+        return self
+
+    def correlation(self):
+        """Pearson correlation matrix; NaN where a pair has no spread."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, 1.0)
+        corr[(self.n < 2) | ~np.isfinite(corr) | (np.diag(self.m2) <= 0)[:, None]] = np.nan
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def _empty_like(self):
+        return CovarianceAccumulator(self.columns)
+
+
+def iter_chunks(data, chunk_rows=CHUNK_ROWS):
+    """Yield consecutive row slices of an in-memory frame."""
+    for start in range(0, len(data), chunk_rows):
+        yield data.iloc[start:start + chunk_rows]
+
+
+def streaming_correlation(chunks, columns):
+    """Correlation matrix of ``columns`` over an iterable of DataFrame chunks."""
+    accumulator = CovarianceAccumulator(columns)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.correlation()
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _correlation(_data, key, columns):
+    return streaming_correlation(iter_chunks(_data), list(columns))
+
+
+@instrument('compute')
+def correlation_matrix(data, columns):
+    """Correlation of ``columns`` in ``data``, computed once per dataset version."""
+    if not isinstance(data, pd.DataFrame):
+        return data.correlation(columns)
+    return _correlation(data, dataset_key(data), tuple(columns))
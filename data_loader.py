@@ -0,0 +1,417 @@
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import types
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+
+from codebook import decode_frame
+from perf import instrument
+from remote import is_remote, remote_copy
+from snapshot import load_snapshot, snapshot_path
+
+# ===========================
+# SHARED DATA SOURCE
+# ===========================
+# The CSV ships with the repo, so pages read the local copy first and only
+# fall back to GitHub when the app is deployed without it. SURVEY_DATA can
+# point at another CSV, a directory of CSVs or a glob of them instead.
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = "freehold_data_on_Climate_Smart_Agriculture.csv"
+DATA_PATH = os.path.join(DATA_DIR, DATA_FILE)
+DATA_URL = f"https://raw.githubusercontent.com/nrhdyh/Smart_Agriculture/refs/heads/main/{DATA_FILE}"
+
+# The first header was saved with a UTF-8 BOM that got decoded as Latin-1
+BOM_GENDER_COLUMN = "ï»¿Gender of household head"
+GENDER_COLUMN = "Gender of household head"
+
+
+# ===========================
+# DECLARED SCHEMA
+# ===========================
+# Every survey answer is a small non-negative code, so anything not listed
+# here is stored as int8 instead of pandas' default int64. Columns are parsed
+# with pandas' safe defaults first and only narrowed once their values are
+# known to fit: missing answers keep a column in float32 (which holds every
+# survey code exactly), negative values in the unsigned columns count as
+# missing and out-of-range codes keep a wider integer type, rather than
+# failing the parse or silently wrapping around.
+CODE_DTYPE = "int8"
+COLUMN_DTYPES = {
+    "Age": "uint8",
+    "Household size": "uint8",
+    "Land size": "float32",
+}
+
+
+def apply_schema(data):
+    """Decode the codebook columns into labelled categoricals and return the frame."""
+    return decode_frame(data)
+
+
+def resolve_source():
+    """Return SURVEY_DATA if set, else the local CSV path or the GitHub URL."""
+    configured = os.environ.get("SURVEY_DATA")
+    if configured:
+        return configured
+    return DATA_PATH if os.path.exists(DATA_PATH) else DATA_URL
+
+
+def survey_files(source):
+    """Expand a source into the CSV files it names, in a stable order.
+
+    A directory means every ``*.csv`` inside it; a pattern is globbed; a
+    single path or URL is returned as is.
+    """
+    if "://" in str(source):
+        return [source]
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    if glob.has_magic(source):
+        return sorted(glob.glob(source))
+    return [source]
+
+
+# Local files bigger than this are summarised chunk by chunk instead of
+# being loaded whole, so memory stays bounded by the chunk size.
+OUT_OF_CORE_BYTES = int(os.environ.get("SURVEY_OUT_OF_CORE_BYTES", 512 * 2**20))
+
+# Loaded frames carry (source, version) so derived caches can key on it
+# without hashing the whole frame on every rerun.
+DATASET_KEY_ATTR = "dataset_key"
+
+
+def is_local(source):
+    """True when ``source`` is a file on disk rather than a URL."""
+    return "://" not in str(source) and os.path.exists(source)
+
+
+def dataset_version(source):
+    """Cheap version stamp (mtime, size) used to key the in-process caches."""
+    if not is_local(source):
+        return None
+    stat = os.stat(source)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def source_version(files):
+    """Version stamp of a whole source: every file with its (mtime, size)."""
+    return tuple((path, dataset_version(path)) for path in files)
+
+
+logger = logging.getLogger("survey.data")
+
+
+def _survey_dtypes():
+    return defaultdict(lambda: CODE_DTYPE, COLUMN_DTYPES)
+
+
+def narrow_codes(data):
+    """Store every numeric column in its declared type where its values allow it."""
+    dtypes = _survey_dtypes()
+    for column in data.columns:
+        series = data[column]
+        if not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        declared = np.dtype(dtypes[column])
+        if declared.kind == "u" and (series < 0).any():
+            # Negative ages and sizes are missing-value codes (e.g. -1), not answers
+            logger.warning("%s has negative values; treating them as missing", column)
+            series = series.where(series >= 0)
+        if declared.kind == "f" or series.dtype.kind == "f":
+            # Missing answers: stay float rather than fail the integer parse
+            data[column] = series.astype(declared if declared.kind == "f" else "float32")
+            continue
+        limits = np.iinfo(declared)
+        if series.empty or limits.min <= series.min() and series.max() <= limits.max:
+            data[column] = series.astype(declared)
+        else:
+            narrowest = pd.to_numeric(series, downcast="integer")
+            logger.warning(
+                "%s has values from %s to %s, outside %s; keeping it as %s",
+                column, series.min(), series.max(), declared, narrowest.dtype,
+            )
+            data[column] = narrowest
+    return data
+
+
+def normalise_columns(data):
+    """Strip the BOM from the header and restore the gender column name."""
+    data.columns = [col.lstrip("\ufeff") for col in data.columns]
+    return data.rename(columns={BOM_GENDER_COLUMN: GENDER_COLUMN})
+
+
+def parse_survey_csv(source):
+    """Parse the survey CSV into compact codes with normalised column names."""
+    return narrow_codes(normalise_columns(pd.read_csv(source)))
+
+
+def iter_survey_chunks(source, chunk_rows):
+    """Yield the survey as typed, undecoded chunks of at most ``chunk_rows`` rows."""
+    for chunk in pd.read_csv(source, chunksize=chunk_rows):
+        yield narrow_codes(normalise_columns(chunk))
+
+
+# ===========================
+# COLUMNAR SIDECAR CACHE
+# ===========================
+# After the first parse, a Parquet copy of the raw integer codes is written
+# next to the CSV. Its metadata records the CSV's mtime, size and SHA-256 so a
+# touched-but-identical file is reused and an edited one is re-parsed.
+# pyarrow is imported by the two functions using it, so snapshot, remote and
+# streamed sources start without it.
+SIDECAR_SUFFIX = ".parquet"
+SIDECAR_META_KEY = b"survey_source"
+# Bumped whenever parsing changes what is stored, so older sidecars are
+# re-parsed (2: codes are range-checked instead of wrapping into int8)
+SIDECAR_FORMAT = 2
+
+
+def sidecar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + SIDECAR_SUFFIX
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks so large surveys stay out of memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_stamp(csv_path, sha256):
+    mtime_ns, size = dataset_version(csv_path)
+    return {"mtime_ns": mtime_ns, "size": size, "sha256": sha256, "format": SIDECAR_FORMAT}
+
+
+def read_sidecar(csv_path):
+    """Return the cached frame for ``csv_path``, or None when stale or missing."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = sidecar_path(csv_path)
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        stamp = json.loads(metadata.get(SIDECAR_META_KEY, b"{}"))
+    except (OSError, pa.ArrowInvalid, ValueError):
+        return None
+
+    mtime_ns, size = dataset_version(csv_path)
+    if stamp.get("format") != SIDECAR_FORMAT:
+        return None
+    if stamp.get("mtime_ns") == mtime_ns and stamp.get("size") == size:
+        refresh = False
+    elif stamp.get("size") == size and stamp.get("sha256") == file_digest(csv_path):
+        # Same bytes under a new mtime (e.g. a fresh checkout); restamp below
+        refresh = True
+    else:
+        return None
+
+    data = pq.read_table(path, memory_map=True).to_pandas()
+    if refresh:
+        write_sidecar(data, csv_path, stamp["sha256"])
+    return data
+
+
+def write_sidecar(data, csv_path, sha256=None):
+    """Write ``data`` next to ``csv_path``; failures only cost the next start."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    stamp = _source_stamp(csv_path, sha256 or file_digest(csv_path))
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SIDECAR_META_KEY] = json.dumps(stamp).encode()
+    path = sidecar_path(csv_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_survey_codes(source):
+    """Load one survey file as undecoded codes, using the sidecar when local."""
+    if not is_local(source):
+        return parse_survey_csv(source)
+    data = read_sidecar(source)
+    if data is None:
+        data = parse_survey_csv(source)
+        write_sidecar(data, source)
+    return data
+
+
+def read_survey(source):
+    """Load the decoded survey frame, going through the sidecar for local files."""
+    return apply_schema(read_survey_codes(source))
+
+
+# ===========================
+# MULTI-FILE INGEST
+# ===========================
+# One CSV per county or survey round: files are parsed in a process pool
+# as compact codes, stacked once, then decoded once.
+SOURCE_COLUMN = "Source file"
+
+# Pools are started from script threads of the multi-threaded server, where
+# forking can deadlock a child on a lock another thread held; a fork server
+# (or spawn, where there is none) starts workers from a clean process
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def pool_workers(count):
+    """Worker processes for ``count`` independent files."""
+    return max(1, min(count, os.cpu_count() or 1))
+
+
+@contextmanager
+def _bare_main():
+    # Streamlit runs the page script as __main__, and forkserver / spawn
+    # workers re-import __main__ from its file, which would run the page
+    # outside Streamlit. Workers only need module-level functions, so they
+    # start against an empty __main__.
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def pool_map(func, *iterables):
+    """``func`` over ``iterables`` in a process pool started without forking; results in order."""
+    calls = list(zip(*iterables))
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    with ProcessPoolExecutor(max_workers=pool_workers(len(calls)), mp_context=context) as pool:
+        # Without fork the pool starts its workers as tasks are submitted
+        with _bare_main():
+            futures = [pool.submit(func, *args) for args in calls]
+        for future in futures:
+            yield future.result()
+
+
+def read_surveys(files):
+    """Load several survey files into one frame tagged with ``SOURCE_COLUMN``."""
+    if len(files) == 1:
+        return read_survey(files[0])
+
+    parts = list(pool_map(read_survey_codes, files))
+
+    data = pd.concat(parts, ignore_index=True)
+    sizes = [len(part) for part in parts]
+    del parts
+    names = [os.path.basename(path) for path in files]
+    data[SOURCE_COLUMN] = pd.Categorical.from_codes(np.repeat(np.arange(len(files)), sizes), names)
+    return apply_schema(data)
+
+
+# ===========================
+# SHARED READ-ONLY FRAME
+# ===========================
+# The loaded frame is a cache resource: every session and page references
+# the same object instead of unpickling a private copy on each call. Its
+# arrays are rebuilt read-only, so an accidental in-place write raises
+# instead of leaking into other sessions; per-session work only allocates
+# its own (small) filtered or aggregated results.
+SHARED_VERSIONS = 2
+
+
+def freeze_frame(data, rows=None):
+    """``data`` (or its ``rows`` positions) rebuilt on read-only arrays.
+
+    Without ``rows`` the columns are read-only views of the existing
+    arrays, so freezing a freshly loaded survey copies nothing (``data``
+    must then be dropped, not written to); with ``rows`` only the selected
+    rows are copied. Each column stays its own
+    array (no consolidation copy) and categoricals keep their dtype.
+    """
+    columns = {}
+    for column in data.columns:
+        series = data[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # The Categorical's own codes; ``.cat.codes`` would be a copy
+            values = series.array.codes
+        else:
+            values = series.to_numpy()
+        # A view leaves the flags of the array it shares untouched
+        values = values.take(rows) if rows is not None else values.view()
+        values.setflags(write=False)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = pd.Categorical.from_codes(values, dtype=series.dtype)
+        columns[column] = values
+    frozen = pd.DataFrame(columns, copy=False)
+    frozen.attrs.update(data.attrs)
+    return frozen
+
+
+# Keeps the current frame plus the one sessions may still hold while a
+# changed source is reloaded
+@st.cache_resource(show_spinner=False, max_entries=SHARED_VERSIONS)
+def _load_survey(source, version):
+    data = freeze_frame(read_surveys(survey_files(source)))
+    data.attrs[DATASET_KEY_ATTR] = (source, version)
+    return data
+
+
+def is_out_of_core(files):
+    """True when local ``files`` are together too large to load as one frame."""
+    local = [path for path in files if is_local(path)]
+    return sum(os.path.getsize(path) for path in local) > OUT_OF_CORE_BYTES
+
+
+# Caches of results derived per dataset key keep at most this many entries
+# each: every filter selection gets its own key, so unbounded caches would
+# grow with each distinct combination for the life of the process
+DERIVED_CACHE_ENTRIES = 64
+
+
+def dataset_key(data):
+    """Version key of a loaded frame, used by caches derived from it."""
+    return data.attrs.get(DATASET_KEY_ATTR)
+
+
+@instrument('load')
+def load_data():
+    """Load the shared survey frame used by every page.
+
+    All pages go through this one cached function, so the CSV is parsed once
+    per process instead of once per page, and again only when the file changes.
+    The frame is shared by every session and read-only; derive, never mutate.
+    A URL is read from a local copy kept current by ``remote.remote_copy``.
+    Sources above ``OUT_OF_CORE_BYTES`` come back as a streamed
+    ``SurveySummary``, which the aggregate and chart helpers accept as well.
+    With SURVEY_SNAPSHOT set, a read-only ``SnapshotData`` is returned instead.
+    """
+    try:
+        snapshot = snapshot_path()
+        if snapshot:
+            return load_snapshot(snapshot, dataset_version(snapshot))
+        source = resolve_source()
+        if is_remote(source):
+            # Read from an on-disk copy that is revalidated on an interval,
+            # so its version (and the parse) only changes with the content
+            source = remote_copy(source)
+        files = survey_files(source)
+        if not files:
+            raise FileNotFoundError(f"No survey CSV files match {source}")
+        version = source_version(files)
+        if is_out_of_core(files):
+            # Imported here because streaming builds on modules importing this one
+            from streaming import load_summary
+            return load_summary(source, version)
+        return _load_survey(source, version)
+    except Exception as e:
+        st.error(f"❌ Error loading data: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from data_loader import dataset_key
+from perf import current_section, record, section, timed
+from snapshot import SnapshotData, capture_figure
+
+# ===========================
+# SHARED FIGURE CACHE
+# ===========================
+# Finished figures are kept as Plotly JSON, keyed by dataset version, chart
+# id and build parameters, so a rerun that changes nothing relevant skips
+# Plotly Express entirely. Memory is capped in bytes with LRU eviction.
+FIGURE_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_MB", 64)) * 2**20
+
+
+class FigureCache:
+    """Thread-safe LRU of serialized figures, bounded by total JSON bytes."""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+@st.cache_resource(show_spinner=False)
+def shared_figure_cache():
+    """The process-wide figure cache shared by every session and page."""
+    return FigureCache()
+
+
+def cached_figure(data, chart_id, build, **params):
+    """Return ``build(**params)``, reusing the stored figure when possible.
+
+    ``params`` must be hashable and cover everything besides the dataset
+    that changes the figure. Frames without a dataset key are never cached.
+    """
+    if isinstance(data, SnapshotData):
+        return data.figure(chart_id, params)
+
+    version = dataset_key(data)
+    rows = len(data)
+    with section(chart_id):
+        if version is None:
+            with timed('figure', chart_id, rows):
+                return build(**params)
+
+        cache = shared_figure_cache()
+        key = (version, chart_id, tuple(sorted(params.items())))
+        payload = cache.get(key)
+        record('cache_hit', chart_id, payload is not None)
+        if payload is not None:
+            record('payload', chart_id, len(payload))
+            capture_figure(chart_id, params, payload)
+            # The JSON came from an already validated figure, so skip validation
+            return go.Figure(json.loads(payload), _validate=False)
+
+        with timed('figure', chart_id, rows):
+            fig = build(**params)
+        payload = fig.to_json()
+        record('payload', chart_id, len(payload))
+        capture_figure(chart_id, params, payload)
+        cache.put(key, payload)
+        return fig
+
+
+# ===========================
+# CONCURRENT FIGURE BUILDS
+# ===========================
+# A page's independent figures are built side by side in a shared thread
+# pool: their aggregations run in numpy/pandas, which release the GIL, so a
+# cold page waits for its slowest chart rather than the sum of them. Workers
+# run under the requesting session's script context, so caches, perf events
+# and snapshot capture behave as they do on the script thread.
+FIGURE_WORKERS = int(os.environ.get("FIGURE_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+@st.cache_resource(show_spinner=False)
+def _figure_pool():
+    return ThreadPoolExecutor(max_workers=FIGURE_WORKERS, thread_name_prefix="figure")
+
+
+def _build_in_session(ctx, parent, data, chart_id, build, params):
+    thread = threading.current_thread()
+    add_script_run_ctx(thread, ctx)
+    try:
+        with section(parent):
+            return cached_figure(data, chart_id, build, **params)
+    finally:
+        # Pool threads serve every session; never leave one attached
+        add_script_run_ctx(thread, None)
+
+
+def prefetch_figures(data, builds, **params):
+    """Start ``cached_figure`` for every ``{chart_id: build}``; return ``{chart_id: Future}``.
+
+    ``params`` go to every build. Pages call ``.result()`` where each chart
+    is placed, so sections still render in page order, each as soon as its
+    own figure is ready. With a single worker, or a snapshot that only
+    reads stored figures, everything is built in turn before returning.
+    """
+    futures = {}
+    if FIGURE_WORKERS <= 1 or isinstance(data, SnapshotData):
+        for chart_id, build in builds.items():
+            futures[chart_id] = Future()
+            futures[chart_id].set_result(cached_figure(data, chart_id, build, **params))
+        return futures
+
+    pool = _figure_pool()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    parent = current_section()
+    for chart_id, build in builds.items():
+        futures[chart_id] = pool.submit(_build_in_session, ctx, parent, data, chart_id, build, params)
+    return futures
@@ -0,0 +1,214 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import DATASET_KEY_ATTR, dataset_key, freeze_frame
+from perf import instrument
+from snapshot import SnapshotData
+
+# ===========================
+# BITMAP INDEXES
+# ===========================
+# Every answer of a filterable column gets a packed bitmap of the rows that
+# gave it, built once per dataset version. A filter is an OR of bitmaps
+# within a column and an AND across columns, so any combination resolves
+# with a few byte-wide operations instead of boolean scans over the frame.
+FILTER_COLUMNS = [
+    'Level of education',
+    'Gender of household head',
+    'Land tenure',
+    'Membership to community organization/Group',
+    'Water harvesting',
+    'Agroforestry',
+]
+
+
+class BitmapIndex:
+    """Packed per-value row bitmaps for the coded ``columns`` of a frame."""
+
+    def __init__(self, data, columns=FILTER_COLUMNS):
+        self.rows = len(data)
+        self.options = {}
+        self._bitmaps = {}
+        for column in columns:
+            if column in data.columns:
+                self._index_column(column, data[column])
+
+    def _index_column(self, column, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            labels = list(series.cat.categories)
+        else:
+            codes = series.to_numpy()
+            if codes.dtype.kind == 'f':
+                # Undecoded column with missing answers
+                codes = np.where(np.isnan(codes), -1, codes).astype('int64')
+            labels = None
+        present = np.flatnonzero(np.bincount(codes[codes >= 0]))
+        bitmaps = {}
+        for code in present:
+            label = labels[code] if labels is not None else int(code)
+            bitmaps[label] = np.packbits(codes == code)
+        self.options[column] = list(bitmaps)
+        self._bitmaps[column] = bitmaps
+
+    @property
+    def columns(self):
+        return list(self.options)
+
+    def bitmaps(self, column):
+        """``{value: packed row bitmap}`` of one indexed column, in code order."""
+        return self._bitmaps[column]
+
+    def select(self, selections):
+        """Row positions matching ``{column: [values]}``; None when nothing is selected."""
+        result = None
+        for column, values in selections.items():
+            bitmaps = self._bitmaps.get(column, {})
+            column_bits = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+            for value in values:
+                if value in bitmaps:
+                    np.bitwise_or(column_bits, bitmaps[value], out=column_bits)
+            result = column_bits if result is None else np.bitwise_and(result, column_bits, out=result)
+        if result is None:
+            return None
+        return np.flatnonzero(np.unpackbits(result, count=self.rows))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _bitmap_index(_data, key):
+    return BitmapIndex(_data)
+
+
+def bitmap_index(data):
+    """The shared bitmap index of ``data``, built once per dataset version."""
+    return _bitmap_index(data, dataset_key(data))
+
+
+# ===========================
+# SHARED FILTERED FRAMES
+# ===========================
+# Every session with the same selection shares one read-only filtered
+# frame. They are kept in an LRU bounded by their total bytes rather than
+# their number, since one selection of a ten-million-row survey can take
+# hundreds of megabytes; an evicted frame lives on only while a session
+# still references it.
+FILTER_CACHE_BYTES = int(os.environ.get("FILTER_CACHE_MB", 512)) * 2**20
+
+
+class FrameCache:
+    """Thread-safe LRU of frames, bounded by the bytes of their columns."""
+
+    def __init__(self, max_bytes=FILTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, frame):
+        size = int(frame.memory_usage(index=False).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (frame, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+
+@st.cache_resource(show_spinner=False)
+def shared_frame_cache():
+    """The process-wide cache of filtered frames."""
+    return FrameCache()
+
+
+def _filtered_frame(data, key, selections):
+    cache = shared_frame_cache()
+    filtered = cache.get((key, selections))
+    if filtered is None:
+        rows = bitmap_index(data).select(dict(selections))
+        # Shared by every session with this selection, so read-only like its source
+        filtered = freeze_frame(data, rows)
+        filtered.attrs[DATASET_KEY_ATTR] = (key, selections)
+        cache.put((key, selections), filtered)
+    return filtered
+
+
+# ===========================
+# SIDEBAR FILTERS
+# ===========================
+# The widgets live in main.py so their state survives page switches; pages
+# only read the current selection through ``filter_data``.
+FILTER_KEY_PREFIX = "filter::"
+
+
+def filter_key(column):
+    return f"{FILTER_KEY_PREFIX}{column}"
+
+
+def active_filters():
+    """Current ``((column, (values...)), ...)`` selection, empty columns left out."""
+    return tuple(
+        (column, tuple(st.session_state[filter_key(column)]))
+        for column in FILTER_COLUMNS
+        if st.session_state.get(filter_key(column))
+    )
+
+
+@instrument('compute')
+def filter_data(data):
+    """Rows of ``data`` matching the sidebar filters, cached per selection.
+
+    The filtered frame carries its own dataset key, so every cube, metric
+    and figure cache keys on the filtered view. Streamed summaries have no
+    rows to select and are returned unchanged.
+    """
+    selections = active_filters()
+    if not selections or not isinstance(data, pd.DataFrame) or data.empty:
+        return data
+    return _filtered_frame(data, dataset_key(data), selections)
+
+
+def render_filter_sidebar(data):
+    """Draw the cross-filter widgets for every page in the sidebar."""
+    st.sidebar.header("🔎 Filters")
+    if isinstance(data, SnapshotData):
+        st.sidebar.caption("Serving a read-only snapshot of the full survey; filters are off.")
+        return
+    if not isinstance(data, pd.DataFrame):
+        st.sidebar.caption("Filters need the survey in memory; this source is summarised while streaming.")
+        return
+    if data.empty:
+        return
+
+    index = bitmap_index(data)
+    for column in index.columns:
+        st.sidebar.multiselect(column, index.options[column], key=filter_key(column), placeholder="All")
+
+    selected = len(filter_data(data))
+    st.sidebar.caption(f"{selected:,} of {len(data):,} households selected")
+    if selected == 0:
+        st.sidebar.warning("No households match these filters.")
@@ -1,16 +1,39 @@
 import streamlit as st
 
-st.set_page_config(page_title="Climate Smart Agriculture Dashboard", layout="wide")
+from data_loader import load_data
+from filters import render_filter_sidebar
+from perf import activate_from_query_params, perf_enabled, render_perf_panel, reset_perf_events
+
+# Page config and shared setup run here once per rerun; the pages only draw
+# their own content and import their plotting libraries on first use
+st.set_page_config(
+    page_title="Climate Smart Agriculture Dashboard",
+    page_icon="🌿",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Debug timings (SURVEY_PERF=1 or ?perf=1) are per run; fragment reruns
+# add to the current run's list
+activate_from_query_params()
+if perf_enabled():
+    reset_perf_events()
 
 # Pages
 #home = st.Page("home.py", title="🏠 Home",)
 objective1 = st.Page("home.py", title="🎓 Objective 1: Education & Demographics", default=True)
 objective2 = st.Page("objective2.py", title="🌾 Objective 2: Land & Perception")
 objective3 = st.Page("objective3.py", title="🌱 Objective 3: Practices & Correlation")
+objective4 = st.Page("objective4.py", title="🧩 Objective 4: Practice Adoption")
 
 # Navigation
 pg = st.navigation({
-    "Main Menu": [objective1, objective2, objective3]
+    "Main Menu": [objective1, objective2, objective3, objective4]
 })
 
+# Cross-filters live here so they apply to, and persist across, every page
+render_filter_sidebar(load_data())
+
 pg.run()
+
+render_perf_panel(pg.title)
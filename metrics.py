@@ -0,0 +1,133 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import DERIVED_CACHE_ENTRIES, dataset_key
+from perf import instrument
+from snapshot import SnapshotData, capture_kpis
+
+# ===========================
+# SUMMARY METRICS ENGINE
+# ===========================
+# Pages declare the KPIs their summary boxes show. Every column is reduced
+# once per dataset version (row count, sum, value frequencies) and all KPIs
+# on every page are read off those reductions instead of rescanning rows.
+#
+# A KPI is the ``mean`` or ``mode`` of a column, or the ``count`` / ``share``
+# of rows whose column equals ``label`` (``count`` without a label counts
+# every answered row). ``adoption`` is the share of answers past code 0,
+# i.e. households using a practice at any level.
+KPI = namedtuple('KPI', ['kind', 'column', 'label'], defaults=[None])
+
+
+def _frequencies(values):
+    """Counts of each integer value, via one bincount over the column."""
+    offset = int(values.min())
+    counts = np.bincount(values.astype('int64') - offset)
+    index = np.arange(offset, offset + len(counts))
+    present = counts > 0
+    return pd.Series(counts[present], index=index[present])
+
+
+def frame_column_stats(data):
+    """Per-column count, sum and value frequencies of an in-memory frame."""
+    stats = {}
+    for column in data.columns:
+        series = data[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+            stats[column] = {
+                'count': int(counts.sum()),
+                'sum': None,
+                'frequencies': pd.Series(counts, index=series.cat.categories),
+            }
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            values = series.to_numpy()
+            frequencies = _frequencies(values) if len(values) else pd.Series(dtype='int64')
+            stats[column] = {
+                'count': len(values),
+                'sum': float(values.sum(dtype='float64')),
+                'frequencies': frequencies,
+            }
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            values = series.to_numpy(dtype='float64')
+            present = values[~np.isnan(values)]
+            # A coded column with missing answers is parsed as float; its
+            # answers still get frequencies so modes and shares work
+            coded = len(present) and np.array_equal(present, np.round(present))
+            stats[column] = {
+                'count': len(present),
+                'sum': float(present.sum()),
+                'frequencies': _frequencies(present) if coded else None,
+            }
+    return stats
+
+
+def summary_column_stats(summary):
+    """The same reductions, read from a streamed summary's single-column counts."""
+    stats = {}
+    for column in summary.columns:
+        table = summary.count_cube(column)
+        labels = table[column]
+        counts = table['Count']
+        if isinstance(labels.dtype, pd.CategoricalDtype):
+            frequencies = pd.Series(counts.to_numpy(), index=labels.to_numpy())
+            frequencies = frequencies.reindex(labels.cat.categories, fill_value=0)
+            total = None
+        else:
+            frequencies = pd.Series(counts.to_numpy(), index=labels.to_numpy())
+            total = float((labels.to_numpy(dtype='float64') * counts).sum())
+        stats[column] = {'count': int(counts.sum()), 'sum': total, 'frequencies': frequencies}
+    return stats
+
+
+@st.cache_data(show_spinner=False, max_entries=DERIVED_CACHE_ENTRIES)
+def _column_stats(_data, key):
+    if isinstance(_data, pd.DataFrame):
+        return frame_column_stats(_data)
+    return summary_column_stats(_data)
+
+
+def evaluate_kpi(kpi, stats):
+    """Value of one declared KPI, or None when the data cannot answer it."""
+    column = stats.get(kpi.column)
+    if column is None or column['count'] == 0:
+        return None
+    if kpi.kind == 'mean':
+        return None if column['sum'] is None else column['sum'] / column['count']
+    if kpi.kind == 'count':
+        if kpi.label is None:
+            return column['count']
+        return int(column['frequencies'].get(kpi.label, 0))
+    if kpi.kind == 'share':
+        return float(column['frequencies'].get(kpi.label, 0) / column['count'])
+    if kpi.kind == 'adoption':
+        # Share of answers past code 0 ("No", "None"): labelled frequencies
+        # start at code 0, numeric ones only list the values observed
+        frequencies = column['frequencies']
+        if frequencies is None:
+            return None
+        if pd.api.types.is_numeric_dtype(frequencies.index):
+            not_adopted = frequencies.get(0, 0)
+        else:
+            not_adopted = frequencies.iloc[0]
+        return float(1 - not_adopted / column['count'])
+    if kpi.kind == 'mode':
+        # idxmax keeps the first value in code order on ties
+        return column['frequencies'].idxmax()
+    raise ValueError(f"Unknown KPI kind: {kpi.kind}")
+
+
+@instrument('compute')
+def summary_metrics(data, kpis):
+    """Evaluate ``{name: KPI}`` against ``data``; unanswerable KPIs are left out."""
+    if isinstance(data, SnapshotData):
+        return data.metrics(kpis)
+    stats = _column_stats(data, dataset_key(data))
+    values = {name: evaluate_kpi(kpi, stats) for name, kpi in kpis.items()}
+    values = {name: value for name, value in values.items() if value is not None}
+    capture_kpis(kpis, values)
+    return values
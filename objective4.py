@@ -0,0 +1,231 @@
+import streamlit as st
+import plotly.graph_objects as go
+from adoption import GROUP_COLUMNS, PRACTICE_COLUMNS, adoption_by, adoption_counts, co_adoption
+from data_loader import load_data
+from figure_cache import cached_figure
+from filters import filter_data
+from metrics import KPI, summary_metrics
+from perf import page_section
+from sections import lazy_tabs
+
+# --- Configuration ---
+# Page config is set once, in main.py, for every page
+PLOTLY_TEMPLATE = 'plotly_dark'
+
+# --- Data Loading ---
+freehold_df = filter_data(load_data())
+
+# --- Streamlit Layout ---
+st.title("🧩 Climate-Smart Practice Adoption")
+
+if freehold_df.empty:
+    st.warning("No data to show. Please check the data source or relax the sidebar filters.")
+else:
+    # --- Objective 4 ---
+    st.header("🧩 Objective 4: Which Practices Are Adopted, and Together")
+    st.markdown("""
+    The survey records twenty climate-smart practices, from biofertilizers to agroforestry.
+    This page looks at all of them at once: how widely each practice is adopted, which practices tend to be adopted together,
+    how many practices a typical household combines, and how adoption differs across demographic groups.
+    """)
+
+    practices = [column for column in PRACTICE_COLUMNS if column in freehold_df.columns]
+
+    # =========================================================
+    # 📊 INTERACTIVE SUMMARY BOXES — Objective 4 Highlights
+    # =========================================================
+    with page_section("Adoption Highlights"):
+        st.subheader("📈 Adoption Highlights")
+
+        # ---- Metrics Calculation ----
+        rates = summary_metrics(freehold_df, {practice: KPI('adoption', practice) for practice in practices})
+        households = len(freehold_df)
+        practices_per_household = sum(rates.values())
+
+        c1, c2, c3, c4 = st.columns(4)
+
+        with c1:
+            st.markdown("### 🏡 Households")
+            st.metric(label="Households Surveyed", value=f"{households:,}")
+            st.caption("Households included under the current sidebar filters.")
+
+        with c2:
+            st.markdown("### 🧮 Practices per Household")
+            st.metric(label="Average Practices Adopted", value=f"{practices_per_household:.1f} of {len(practices)}")
+            st.progress(min(practices_per_household / max(len(practices), 1), 1.0))
+            st.caption("Average number of climate-smart practices a household uses.")
+
+        if rates:
+            most_adopted = max(rates, key=rates.get)
+            least_adopted = min(rates, key=rates.get)
+
+            with c3:
+                st.markdown("### 🥇 Most Adopted")
+                st.metric(label=most_adopted, value=f"{rates[most_adopted] * 100:.1f}%")
+                st.progress(rates[most_adopted])
+                st.caption("The practice used by the largest share of households.")
+
+            with c4:
+                st.markdown("### 🐢 Least Adopted")
+                st.metric(label=least_adopted, value=f"{rates[least_adopted] * 100:.1f}%")
+                st.progress(rates[least_adopted])
+                st.caption("The practice used by the smallest share of households.")
+
+    st.markdown("---")
+
+    # 1. Adoption Rate of Each Practice
+    @st.fragment
+    def render_adoption_rates_section():
+        st.subheader("1. Adoption Rate of Each Practice")
+
+        def build_adoption_rates_bar(template):
+            pairs = co_adoption(freehold_df)
+            rates = (pairs.to_numpy().diagonal() / len(freehold_df) * 100).round(1)
+            order = rates.argsort()
+
+            fig = go.Figure(go.Bar(
+                x=rates[order],
+                y=pairs.index[order],
+                orientation='h',
+                text=[f"{rate}%" for rate in rates[order]],
+                textposition='outside'
+            ))
+            fig.update_layout(
+                title='Share of Households Adopting Each Practice',
+                template=template,
+                xaxis_title='Households adopting (%)',
+                height=600
+            )
+            return fig
+
+        fig_rates = cached_figure(freehold_df, 'objective4/adoption_rates_bar', build_adoption_rates_bar, template=PLOTLY_TEMPLATE)
+
+        st.plotly_chart(fig_rates, use_container_width=True)
+        st.markdown("""
+        Each bar is the share of households using a practice at any level.
+        Low-cost practices that fit existing routines, such as water harvesting, biofertilizers and animal manure, are the most widespread,
+        while structural works that need labour or capital up front, such as retention pits and ditches, remain rare.
+        """)
+
+    # 2. Co-adoption of Practices
+    @st.fragment
+    def render_co_adoption_section():
+        st.subheader("2. Co-adoption of Practices")
+
+        def build_co_adoption_heatmap(template):
+            pairs = co_adoption(freehold_df)
+            adopters = pairs.to_numpy().diagonal()
+            # Row i, column j: share of adopters of practice i who also adopt practice j
+            conditional = pairs.to_numpy() / adopters.clip(min=1)[:, None] * 100
+
+            fig = go.Figure(data=go.Heatmap(
+                z=conditional,
+                x=pairs.columns,
+                y=pairs.index,
+                colorscale='Viridis',
+                zmin=0,
+                zmax=100,
+                customdata=pairs.to_numpy(),
+                texttemplate='%{z:.0f}',
+                hovertemplate='%{customdata:,} households adopt both %{y} and %{x}<br>'
+                              '%{z:.1f}% of %{y} adopters<extra></extra>',
+                colorbar=dict(title='% also adopting')
+            ))
+            fig.update_layout(
+                title='Share of Each Practice\'s Adopters (rows) Who Also Adopt Another (columns)',
+                template=template,
+                height=700,
+                yaxis=dict(autorange='reversed')
+            )
+            return fig
+
+        fig_co_adoption = cached_figure(freehold_df, 'objective4/co_adoption_heatmap', build_co_adoption_heatmap, template=PLOTLY_TEMPLATE)
+
+        st.plotly_chart(fig_co_adoption, use_container_width=True)
+        st.markdown("""
+        Read each row as "of the households using this practice, how many also use the one in the column".
+        Bright columns are practices that accompany almost everything else, while bright cells away from them point to practices that are adopted as a package.
+        Soil and water conservation works tend to cluster, which suggests they are promoted, or become feasible, together.
+        """)
+
+    # 3. Number of Practices per Household
+    @st.fragment
+    def render_practice_count_section():
+        st.subheader("3. Number of Practices per Household")
+
+        def build_practice_count_bar(template):
+            counts = adoption_counts(freehold_df)
+
+            fig = go.Figure(go.Bar(
+                x=counts['Practices adopted'],
+                y=counts['Households'],
+                hovertemplate='%{x} practices: %{y:,} households<extra></extra>'
+            ))
+            fig.update_layout(
+                title='Households by Number of Climate-Smart Practices Adopted',
+                template=template,
+                xaxis_title='Practices adopted',
+                yaxis_title='Households',
+                xaxis=dict(dtick=1)
+            )
+            return fig
+
+        fig_counts = cached_figure(freehold_df, 'objective4/practice_count_bar', build_practice_count_bar, template=PLOTLY_TEMPLATE)
+
+        st.plotly_chart(fig_counts, use_container_width=True)
+        st.markdown("""
+        Very few households rely on a single practice.
+        Most combine several practices, which fits the co-adoption patterns above: adoption tends to come in bundles rather than one technique at a time.
+        """)
+
+    # 4. Adoption by Demographic Group
+    @st.fragment
+    def render_adoption_by_group_section():
+        st.subheader("4. Adoption by Demographic Group")
+
+        groups = [column for column in GROUP_COLUMNS if column in freehold_df.columns]
+        group = st.selectbox('Break adoption down by', groups, key='objective4_group')
+
+        def build_adoption_by_group_heatmap(template, column):
+            table = adoption_by(freehold_df, column)
+            households = table['Households'].to_numpy()
+            table_practices = [practice for practice in PRACTICE_COLUMNS if practice in table.columns]
+            rates = table[table_practices].to_numpy() / households.clip(min=1)[:, None] * 100
+            labels = [f"{label} (n={count:,})" for label, count in zip(table[column].astype(str), households)]
+
+            fig = go.Figure(data=go.Heatmap(
+                z=rates,
+                x=table_practices,
+                y=labels,
+                colorscale='Viridis',
+                zmin=0,
+                zmax=100,
+                texttemplate='%{z:.0f}',
+                hovertemplate='%{y}<br>%{x}: %{z:.1f}% adopt<extra></extra>',
+                colorbar=dict(title='% adopting')
+            ))
+            fig.update_layout(
+                title=f'Adoption Rate of Each Practice by {column}',
+                template=template,
+                yaxis=dict(autorange='reversed')
+            )
+            return fig
+
+        fig_by_group = cached_figure(
+            freehold_df, 'objective4/adoption_by_group_heatmap', build_adoption_by_group_heatmap,
+            template=PLOTLY_TEMPLATE, column=group
+        )
+
+        st.plotly_chart(fig_by_group, use_container_width=True)
+        st.markdown("""
+        Each cell is the share of households in a group that use a practice.
+        Comparing rows shows whether a practice's uptake depends on who heads the household,
+        for example whether training access or group membership goes with broader adoption of soil and water conservation.
+        """)
+
+    lazy_tabs({
+        '📊 Adoption Rates': render_adoption_rates_section,
+        '🔗 Co-adoption': render_co_adoption_section,
+        '🧮 Practices per Household': render_practice_count_section,
+        '👥 Adoption by Group': render_adoption_by_group_section,
+    }, key='objective4_section')
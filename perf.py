@@ -0,0 +1,210 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ===========================
+# OPT-IN PERFORMANCE TIMINGS
+# ===========================
+# With SURVEY_PERF=1 (or ?perf=1 in the URL) the loader, the aggregate
+# helpers, the figure cache and the page sections record how long they took
+# and how many rows they saw into the session, grouped by the section being
+# built. Disabled, every hook costs one environment/session lookup.
+PERF_ENV = "SURVEY_PERF"
+PERF_QUERY_PARAM = "perf"
+PERF_SESSION_FLAG = "_perf_enabled"
+PERF_EVENTS_KEY = "_perf_events"
+PAGE_SECTION = "page"
+
+# Units of the stages that are not wall-clock seconds
+STAGE_UNITS = {"payload": "bytes", "cache_hit": "hit"}
+
+# Sessions run in their own threads, so each keeps its own section stack
+_local = threading.local()
+
+
+def _sections():
+    if not hasattr(_local, "sections"):
+        _local.sections = [PAGE_SECTION]
+    return _local.sections
+
+
+def perf_enabled():
+    if os.environ.get(PERF_ENV) == "1":
+        return True
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return False
+    return st.session_state.get(PERF_SESSION_FLAG, False)
+
+
+def activate_from_query_params():
+    """Turn debug mode on for this session when the URL carries ``?perf=1``."""
+    if st.query_params.get(PERF_QUERY_PARAM) == "1":
+        st.session_state[PERF_SESSION_FLAG] = True
+
+
+def record(stage, name, value, rows=None):
+    """Append one ``stage`` measurement (seconds or bytes) to the session."""
+    if not perf_enabled():
+        return
+    events = st.session_state.setdefault(PERF_EVENTS_KEY, [])
+    events.append({
+        "section": current_section(),
+        "stage": stage,
+        "name": name,
+        "value": value,
+        "rows": rows,
+    })
+
+
+def perf_events():
+    return list(st.session_state.get(PERF_EVENTS_KEY, []))
+
+
+def reset_perf_events():
+    st.session_state[PERF_EVENTS_KEY] = []
+
+
+@contextmanager
+def timed(stage, name, rows=None):
+    """Record the wall time of the ``with`` body under ``stage``."""
+    if not perf_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, name, time.perf_counter() - start, rows)
+
+
+def current_section():
+    """Name of the section measurements on this thread are attributed to."""
+    return _sections()[-1]
+
+
+@contextmanager
+def section(name):
+    """Attribute measurements taken inside the ``with`` body to ``name``."""
+    _sections().append(name)
+    try:
+        yield
+    finally:
+        _sections().pop()
+
+
+@contextmanager
+def page_section(name):
+    """A named part of a page: timed as a whole and owning what runs inside."""
+    with section(name), timed("render", name):
+        yield
+
+
+def _row_count(value):
+    return len(value) if hasattr(value, "__len__") else None
+
+
+def instrument(stage):
+    """Decorator form of ``timed``, named after the wrapped function.
+
+    Rows are taken from the first argument (the frame or summary being
+    processed), or from the result when the function takes none.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not perf_enabled():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            rows = _row_count(args[0] if args else result)
+            record(stage, func.__name__, time.perf_counter() - start, rows)
+            return result
+        return wrapper
+    return decorator
+
+
+# ===========================
+# DEBUG PANEL AND LOG EXPORT
+# ===========================
+# Each event is also emitted as one JSON line on the "survey.perf" logger
+# (stdout by default, or the file named by SURVEY_PERF_LOG) for monitoring.
+PERF_LOG_ENV = "SURVEY_PERF_LOG"
+PERF_LOGGER = "survey.perf"
+
+
+def structured_events(page):
+    """Session events as flat, JSON-ready records tagged with page and session."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    session_id = ctx.session_id if ctx is not None else None
+    timestamp = time.time()
+    return [
+        {
+            "timestamp": timestamp,
+            "session": session_id,
+            "page": page,
+            "section": event["section"],
+            "stage": event["stage"],
+            "name": event["name"],
+            "unit": STAGE_UNITS.get(event["stage"], "seconds"),
+            "value": event["value"],
+            "rows": event["rows"],
+        }
+        for event in perf_events()
+    ]
+
+
+def _perf_logger():
+    logger = logging.getLogger(PERF_LOGGER)
+    if not logger.handlers:
+        path = os.environ.get(PERF_LOG_ENV)
+        handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def log_perf_events(records):
+    logger = _perf_logger()
+    for item in records:
+        logger.info(json.dumps(item, default=str))
+
+
+def render_perf_panel(page):
+    """Sidebar table of this run's timings, with a JSON-lines download."""
+    if not perf_enabled():
+        return
+    records = structured_events(page)
+    log_perf_events(records)
+
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        if not records:
+            st.caption("No measurements recorded on this run.")
+            return
+        import pandas as pd
+        table = pd.DataFrame(records)
+        timings = table[table["unit"] == "seconds"]
+        payloads = table[table["unit"] == "bytes"]
+        totals = timings.groupby("stage")["value"].sum() * 1000
+        st.caption(" · ".join(f"{stage} {ms:,.0f} ms" for stage, ms in totals.items()))
+        if not payloads.empty:
+            st.caption(f"Figure JSON {payloads['value'].sum() / 1024:,.1f} KB")
+        view = table[["section", "stage", "name", "value", "unit", "rows"]].copy()
+        view.loc[view["unit"] == "seconds", "value"] *= 1000
+        view["unit"] = view["unit"].replace({"seconds": "ms"})
+        st.dataframe(view, hide_index=True)
+        st.download_button(
+            "Export as JSON lines",
+            "\n".join(json.dumps(item, default=str) for item in records),
+            file_name="perf_events.jsonl",
+            mime="application/json",
+        )
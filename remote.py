@@ -0,0 +1,182 @@
+"""On-disk copy of a remote survey CSV, kept current with conditional requests.
+
+    python remote.py https://example.org/survey.csv    # revalidate once and report
+
+The loader reads a remote source from a local file under ``.remote_cache``.
+At most every ``SURVEY_REVALIDATE_SECONDS`` a request carrying the stored
+ETag / Last-Modified asks the server whether it changed. A 304 or identical
+bytes leave the file untouched, so nothing downstream is re-parsed. Only
+new content replaces it, which changes its version stamp. When the server
+cannot be reached the last good copy keeps being served.
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# ===========================
+# REMOTE CACHE SETTINGS
+# ===========================
+REMOTE_CACHE_ENV = "SURVEY_REMOTE_CACHE"
+REVALIDATE_ENV = "SURVEY_REVALIDATE_SECONDS"
+REMOTE_CACHE_DIR = os.environ.get(
+    REMOTE_CACHE_ENV, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".remote_cache")
+)
+REVALIDATE_SECONDS = float(os.environ.get(REVALIDATE_ENV, 300))
+REQUEST_TIMEOUT = 15
+DOWNLOAD_BLOCK = 1 << 20
+
+logger = logging.getLogger("survey.remote")
+
+# Last revalidation per cached copy in this process (time.monotonic())
+_checked = {}
+_lock = threading.Lock()
+
+
+def is_remote(source):
+    """True when ``source`` is a URL rather than a path."""
+    return "://" in str(source)
+
+
+def cache_paths(url, cache_dir=None):
+    """(data file, metadata file) holding the local copy of ``url``."""
+    cache_dir = cache_dir or REMOTE_CACHE_DIR
+    name = os.path.basename(urllib.parse.urlparse(url).path) or "survey.csv"
+    stem = f"{os.path.splitext(name)[0]}.{hashlib.sha256(url.encode()).hexdigest()[:16]}"
+    return os.path.join(cache_dir, f"{stem}.csv"), os.path.join(cache_dir, f"{stem}.json")
+
+
+def _read_metadata(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_metadata(path, metadata):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(metadata, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _download(response, path):
+    """Stream ``response`` into a temporary file beside ``path``; return (tmp path, sha256)."""
+    digest = hashlib.sha256()
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fh:
+            for block in iter(lambda: response.read(DOWNLOAD_BLOCK), b""):
+                digest.update(block)
+                fh.write(block)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+# ===========================
+# CONDITIONAL FETCH
+# ===========================
+def revalidate(url, cache_dir=None):
+    """Bring the local copy of ``url`` up to date with one (conditional) request.
+
+    Returns "fetched" for a first download, "changed" when new content
+    replaced the copy, and "not-modified" or "unchanged" when the copy was
+    kept, after a 304 or after a 200 with the same bytes. Network and HTTP
+    errors propagate.
+    """
+    data_path, meta_path = cache_paths(url, cache_dir)
+    metadata = _read_metadata(meta_path) if os.path.exists(data_path) else {}
+
+    request = urllib.request.Request(url)
+    if metadata.get("etag"):
+        request.add_header("If-None-Match", metadata["etag"])
+    if metadata.get("last_modified"):
+        request.add_header("If-Modified-Since", metadata["last_modified"])
+
+    try:
+        response = urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not metadata:
+            raise
+        status = "not-modified"
+    else:
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        with response:
+            tmp_path, sha256 = _download(response, data_path)
+            headers = response.headers
+        if sha256 == metadata.get("sha256"):
+            # Same bytes (e.g. a server without validators): keep the file and its mtime
+            os.remove(tmp_path)
+            status = "unchanged"
+        else:
+            os.replace(tmp_path, data_path)
+            status = "changed" if metadata else "fetched"
+            metadata["sha256"] = sha256
+            metadata["changed_at"] = time.time()
+        metadata.update({
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        })
+
+    metadata["checked_at"] = time.time()
+    _write_metadata(meta_path, metadata)
+    return status
+
+
+def remote_copy(url, interval=None, cache_dir=None):
+    """Local path of the copy of ``url``, revalidated at most every ``interval`` seconds.
+
+    Only the very first download can fail the call: afterwards an
+    unreachable source is logged and the last good copy is returned. While
+    one session revalidates, the others keep reading the current copy.
+    """
+    interval = REVALIDATE_SECONDS if interval is None else interval
+    data_path, meta_path = cache_paths(url, cache_dir)
+    have_copy = os.path.exists(data_path)
+    last_checked = _checked.get(data_path)
+    if have_copy and last_checked is not None and time.monotonic() - last_checked < interval:
+        return data_path
+
+    if not _lock.acquire(blocking=not have_copy):
+        return data_path
+    try:
+        status = revalidate(url, cache_dir)
+        logger.info("%s: %s", url, status)
+    except OSError as e:
+        if not os.path.exists(data_path):
+            raise
+        fetched_at = _read_metadata(meta_path).get("changed_at")
+        logger.warning(
+            "%s is unreachable (%s); serving the copy from %s", url, e,
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(fetched_at)) if fetched_at else "an earlier run",
+        )
+    finally:
+        # Failures wait out the interval too, rather than retrying on every rerun
+        _checked[data_path] = time.monotonic()
+        _lock.release()
+    return data_path
+
+
+def main(argv=None):
+    urls = (argv if argv is not None else sys.argv[1:])
+    if not urls:
+        print(__doc__)
+        return 2
+    for url in urls:
+        status = revalidate(url)
+        print(f"{url}: {status} -> {cache_paths(url)[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
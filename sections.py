@@ -0,0 +1,29 @@
+import streamlit as st
+
+from perf import page_section
+
+# ===========================
+# ON-DEMAND PAGE SECTIONS
+# ===========================
+# Stateful tabs rerun the page when the user switches, so only the open tab's
+# section is computed and sent. Sections are fragments: a widget inside one
+# reruns that section alone rather than the whole page.
+
+
+def lazy_tabs(sections, key):
+    """Render ``{label: render}`` as tabs, running only the selected one."""
+    tabs = st.tabs(list(sections), key=key, on_change='rerun')
+    for tab, (label, render) in zip(tabs, sections.items()):
+        with tab:
+            if tab.open:
+                with page_section(label):
+                    render()
+
+
+def lazy_expander(label, render, key):
+    """Collapsed expander whose content is only computed once it is opened."""
+    expander = st.expander(label, key=key, on_change='rerun')
+    with expander:
+        if expander.open:
+            with page_section(label):
+                render()
@@ -0,0 +1,171 @@
+"""Export the default dashboard as a static snapshot, and serve it read-only.
+
+    python snapshot.py                        # writes survey_snapshot.json
+    python snapshot.py --output /srv/snapshot.json
+
+The CLI runs every page headlessly, opening each lazy section and trying
+every option of its selectboxes and radios, and captures each figure's
+JSON and each KPI value. Starting the app with
+SURVEY_SNAPSHOT=<bundle> then serves those results directly: pages get a
+``SnapshotData`` stand-in instead of the survey, so no session parses,
+aggregates or builds a figure from data.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# ===========================
+# SNAPSHOT BUNDLE
+# ===========================
+SNAPSHOT_ENV = "SURVEY_SNAPSHOT"
+SNAPSHOT_FILE = "survey_snapshot.json"
+SNAPSHOT_FORMAT = 1
+SAMPLE_ROWS = 5
+
+
+def snapshot_path():
+    """Bundle the app should serve read-only, or None for live data."""
+    return os.environ.get(SNAPSHOT_ENV) or None
+
+
+def figure_key(chart_id, params):
+    return f"{chart_id}|{json.dumps(sorted(params.items()), default=list)}"
+
+
+def kpi_key(kpi):
+    return f"{kpi.kind}|{kpi.column}|{kpi.label}"
+
+
+def _json_value(value):
+    # KPI values come back as numpy scalars or category labels
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class SnapshotData:
+    """Read-only stand-in for the survey frame, answering from a bundle."""
+
+    def __init__(self, bundle, path):
+        self.rows = bundle["rows"]
+        self.columns = list(bundle["columns"])
+        self.attrs = {"dataset_key": ("snapshot", path, bundle["created"])}
+        self._sample = bundle["sample"]
+        self._figures = bundle["figures"]
+        self._kpis = bundle["kpis"]
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def head(self, n=SAMPLE_ROWS):
+        return pd.DataFrame(self._sample[:n], columns=self.columns)
+
+    def figure(self, chart_id, params):
+        """The captured figure, rebuilt without re-running Plotly validation."""
+        payload = self._figures.get(figure_key(chart_id, params))
+        if payload is None:
+            fig = go.Figure()
+            fig.update_layout(title=f"{chart_id} is not part of this snapshot")
+            return fig
+        return go.Figure(json.loads(payload), _validate=False)
+
+    def metrics(self, kpis):
+        """Captured KPI values for ``{name: KPI}``; missing ones are left out."""
+        return {name: self._kpis[kpi_key(kpi)] for name, kpi in kpis.items() if kpi_key(kpi) in self._kpis}
+
+
+@st.cache_resource(show_spinner=False)
+def load_snapshot(path, version):
+    """Shared snapshot for every session, reloaded when the file changes."""
+    with open(path) as fh:
+        bundle = json.load(fh)
+    if bundle.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a format {SNAPSHOT_FORMAT} survey snapshot")
+    return SnapshotData(bundle, path)
+
+
+# ===========================
+# CAPTURE DURING EXPORT
+# ===========================
+# While the CLI runs the pages, the figure cache and the metrics engine hand
+# every result they return to ``capture_*``; outside an export this is a no-op.
+_capture = None
+
+
+def capture_figure(chart_id, params, payload):
+    if _capture is not None:
+        _capture["figures"][figure_key(chart_id, params)] = payload
+
+
+def capture_kpis(kpis, values):
+    if _capture is not None:
+        for name, kpi in kpis.items():
+            if name in values:
+                _capture["kpis"][kpi_key(kpi)] = _json_value(values[name])
+
+
+def export_snapshot(output):
+    """Run every page, tab and widget option and write the captured results to ``output``."""
+    global _capture
+    # Imported here: the loader imports this module, and serving a snapshot
+    # should never load the test harness
+    from benchmark import PAGES, run_page
+    from data_loader import load_data, resolve_source
+
+    os.environ.pop(SNAPSHOT_ENV, None)
+    _capture = {"figures": {}, "kpis": {}}
+    try:
+        for page, tabs_key in PAGES.items():
+            _, _, errors = run_page(page, tabs_key, all_options=True)
+            if errors:
+                raise RuntimeError(f"{page} failed while exporting: {errors[0]}")
+        data = load_data()
+        bundle = {
+            "format": SNAPSHOT_FORMAT,
+            "created": time.time(),
+            "source": str(resolve_source()),
+            "rows": len(data),
+            "columns": list(data.columns),
+            "sample": json.loads(data.head(SAMPLE_ROWS).to_json(orient="values")),
+            "figures": _capture["figures"],
+            "kpis": _capture["kpis"],
+        }
+    finally:
+        _capture = None
+
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(bundle, fh, default=_json_value)
+    os.replace(tmp_path, output)
+    return bundle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), SNAPSHOT_FILE), help="bundle to write")
+    args = parser.parse_args(argv)
+
+    bundle = export_snapshot(args.output)
+    print(f"Wrote {len(bundle['figures'])} figures and {len(bundle['kpis'])} KPIs for "
+          f"{bundle['rows']:,} rows to {args.output}")
+    print(f"Serve it read-only with {SNAPSHOT_ENV}={args.output} streamlit run main.py")
+    return 0
+
+
+if __name__ == "__main__":
+    # Go through the imported module so the capture hooks share its state
+    import snapshot
+    sys.exit(snapshot.main())
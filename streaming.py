@@ -0,0 +1,149 @@
+import streamlit as st
+
+from adoption import AdoptionTotals
+from aggregates import CUBE_DIMENSIONS, DISTRIBUTION_PAIRS
+from association import ContingencyAccumulator, association_columns
+from codebook import decode_frame
+from correlation import CovarianceAccumulator
+from data_loader import DATASET_KEY_ATTR, SHARED_VERSIONS, iter_survey_chunks, pool_map, survey_files
+
+# ===========================
+# OUT-OF-CORE SURVEY SUMMARY
+# ===========================
+# Surveys too large for one frame are read in chunks and folded into count
+# tables, correlation moments, pairwise contingency counts and
+# practice-adoption totals. Memory is bounded by the chunk size plus the
+# number of distinct answer combinations, never by the row count.
+CHUNK_ROWS = 250_000
+SAMPLE_ROWS = 5
+
+
+class SurveySummary:
+    """Everything the pages draw, accumulated from undecoded survey chunks.
+
+    Counts are kept per survey code and only decoded to labels when read,
+    so chunks (or whole summaries) can be merged by simple addition.
+    """
+
+    def __init__(self, dimensions=(), sample_rows=SAMPLE_ROWS):
+        self.dimensions = [tuple(dims) for dims in dimensions]
+        self.sample_rows = sample_rows
+        self.rows = 0
+        self.columns = []
+        self.attrs = {}
+        self._counts = {}
+        self._sample = None
+        self._moments = None
+        self._contingency = None
+        self._adoption = AdoptionTotals()
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def _tracked(self):
+        # Every single column, plus the configured combinations present here
+        singles = [(col,) for col in self.columns]
+        return singles + [
+            dims for dims in self.dimensions
+            if len(dims) > 1 and all(col in self.columns for col in dims)
+        ]
+
+    def update(self, chunk):
+        """Fold one undecoded chunk into the counts and moments."""
+        if self._moments is None:
+            self.columns = list(chunk.columns)
+            self._moments = CovarianceAccumulator(self.columns)
+            self._contingency = ContingencyAccumulator(association_columns(self.columns))
+            self._sample = chunk.head(self.sample_rows).copy()
+        self.rows += len(chunk)
+        for dims in self._tracked():
+            self._add_counts(dims, chunk.groupby(list(dims), sort=False).size())
+        self._moments.update(chunk)
+        self._contingency.update(chunk)
+        self._adoption.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Add another summary of the same survey layout into this one."""
+        if other._moments is None:
+            return self
+        if self._moments is None:
+            self.columns = list(other.columns)
+            self._moments = CovarianceAccumulator(self.columns)
+            self._contingency = ContingencyAccumulator(association_columns(self.columns))
+            self._sample = other._sample
+        self.rows += other.rows
+        for dims, counts in other._counts.items():
+            self._add_counts(dims, counts)
+        self._moments.merge(other._moments)
+        self._contingency.merge(other._contingency)
+        self._adoption.merge(other._adoption)
+        return self
+
+    def _add_counts(self, dims, counts):
+        current = self._counts.get(dims)
+        self._counts[dims] = counts if current is None else current.add(counts, fill_value=0)
+
+    def count_cube(self, *dims):
+        """Decoded (dims..., Count) table, in the same shape as ``count_cube``."""
+        if dims not in self._counts:
+            raise KeyError(f"{dims} was not accumulated while streaming; add it to CUBE_DIMENSIONS")
+        table = self._counts[dims].sort_index().reset_index(name='Count')
+        table['Count'] = table['Count'].astype('int64')
+        return decode_frame(table)
+
+    def correlation(self, columns):
+        """Pairwise-complete correlation of ``columns`` over every streamed row."""
+        return self._moments.correlation().loc[list(columns), list(columns)]
+
+    def association(self):
+        """Categorical association of every column pair over every streamed row."""
+        return self._contingency.association()
+
+    def co_adoption(self):
+        return self._adoption.co_adoption()
+
+    def adoption_counts(self):
+        return self._adoption.adoption_counts()
+
+    def adoption_by(self, column):
+        return self._adoption.adoption_by(column)
+
+    def head(self, n=SAMPLE_ROWS):
+        """First rows of the survey, decoded like a loaded frame."""
+        return decode_frame(self._sample.head(n).copy())
+
+
+def stream_dimensions():
+    """Multi-column combinations a streamed summary needs for the pages."""
+    return list(CUBE_DIMENSIONS) + list(DISTRIBUTION_PAIRS)
+
+
+def summarise_csv(source, chunk_rows=CHUNK_ROWS):
+    """Stream a survey CSV into a ``SurveySummary`` one chunk at a time."""
+    summary = SurveySummary(stream_dimensions())
+    for chunk in iter_survey_chunks(source, chunk_rows):
+        summary.update(chunk)
+    return summary
+
+
+def summarise_files(files, chunk_rows=CHUNK_ROWS):
+    """Summarise several survey files in parallel and merge the results."""
+    if len(files) == 1:
+        return summarise_csv(files[0], chunk_rows)
+    summary = SurveySummary(stream_dimensions())
+    for part in pool_map(summarise_csv, files, [chunk_rows] * len(files)):
+        summary.merge(part)
+    return summary
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_VERSIONS)
+def load_summary(source, version):
+    """Streamed summary of ``source`` for the given file version, shared by every session."""
+    summary = summarise_files(survey_files(source))
+    summary.attrs[DATASET_KEY_ATTR] = (source, version)
+    return summary